@@ -23,6 +23,9 @@ def create_app():
     app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'}
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # max file size 16MB
 
+    from .services import green_db
+    green_db.init_app(app)
+
     db.init_app(app)
     login_manager.init_app(app)
     csrf = CSRFProtect(app)
@@ -42,11 +45,24 @@ def create_app():
     app.register_blueprint(office_bp)
     app.register_blueprint(student_bp)
 
-    from .models import User
+    from .services import stats_counters, inquiry_stats, name_cache, passwords, user_cache, export_jobs, retention
+    from .commands import register_commands
+
+    from .services.audit_sink import audit_sink
+
+    stats_counters.init_app(app)
+    inquiry_stats.init_app(app)
+    name_cache.init_app(app)
+    passwords.init_app(app)
+    user_cache.init_app(app)
+    export_jobs.init_app(app)
+    retention.init_app(app)
+    audit_sink.init_app(app)
+    register_commands(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.load_cached_user(int(user_id))
     
     @app.context_processor
     def inject_user():
@@ -56,5 +72,9 @@ def create_app():
     with app.app_context():
         from app.websockets import init_app as init_websocket
         init_websocket()
+
+    from app.websockets.admin_sockets import stats_broadcaster, admin_stats_broadcaster
+    stats_broadcaster.init_app(app)
+    admin_stats_broadcaster.init_app(app)
     
     return app
\ No newline at end of file
@@ -6,6 +6,7 @@ from app.models import Announcement, Office, AuditLog, User, AnnouncementImage
 from datetime import datetime, timedelta
 from sqlalchemy import desc
 from app.admin import admin_bp
+from app.services.name_cache import get_user_name, get_office_name
 import os
 from werkzeug.utils import secure_filename
 from uuid import uuid4
@@ -433,8 +434,8 @@ def get_announcements_api():
                     'content': a.content,
                     'is_public': a.is_public,
                     'created_at': a.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'author': User.query.get(a.author_id).get_full_name() if a.author_id else 'System',
-                    'target_office': Office.query.get(a.target_office_id).name if a.target_office_id else None,
+                    'author': get_user_name(a.author_id, 'Unknown') if a.author_id else 'System',
+                    'target_office': get_office_name(a.target_office_id),
                     'images': [
                         {
                             'id': img.id,
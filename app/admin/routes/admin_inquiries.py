@@ -10,6 +10,8 @@ from sqlalchemy import func, case, or_, desc
 import random
 import os
 from app.admin import admin_bp
+from app.services.inquiry_stats import get_inquiry_stats
+from app.services.search import text_match, matching_student_ids
 
 @admin_bp.route('/admin_inquiries')
 @login_required
@@ -64,14 +66,10 @@ def all_inquiries():
             query = query.filter(Inquiry.created_at < end_date)
     
     if search_query:
-        search = f"%{search_query}%"
         query = query.filter(
             or_(
-                User.first_name.ilike(search),
-                User.last_name.ilike(search),
-                Student.student_number.ilike(search),
-                Inquiry.subject.ilike(search),
-                Inquiry.content.ilike(search)
+                Inquiry.student_id.in_(matching_student_ids(search_query, include_student_number=True)),
+                text_match(search_query, Inquiry.subject)
             )
         )
     
@@ -93,92 +91,6 @@ def all_inquiries():
         stats=stats
     )
 
-def get_inquiry_stats():
-    """Calculate inquiry statistics for the dashboard"""
-
-    total = Inquiry.query.count()
-    pending = Inquiry.query.filter_by(status='pending').count()
-    in_progress = Inquiry.query.filter_by(status='in_progress').count()
-    resolved = Inquiry.query.filter_by(status='resolved').count()
-
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    start_of_week = today - timedelta(days=today.weekday())
-    
-    start_of_last_week = start_of_week - timedelta(days=7)
-    end_of_last_week = start_of_week - timedelta(seconds=1)
-    
-    this_week_total = Inquiry.query.filter(Inquiry.created_at >= start_of_week).count()
-    
-    last_week_total = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_last_week,
-        Inquiry.created_at <= end_of_last_week
-    ).count()
-
-    if last_week_total > 0:
-        total_change = ((this_week_total - last_week_total) / last_week_total) * 100
-    else:
-        total_change = 100 if this_week_total > 0 else 0
-    
-    this_week_pending = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_week,
-        Inquiry.status == 'pending'
-    ).count()
-    
-    last_week_pending = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_last_week,
-        Inquiry.created_at <= end_of_last_week,
-        Inquiry.status == 'pending'
-    ).count()
-    
-    if last_week_pending > 0:
-        pending_change = ((this_week_pending - last_week_pending) / last_week_pending) * 100
-    else:
-        pending_change = 100 if this_week_pending > 0 else 0
-    
-    this_week_in_progress = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_week,
-        Inquiry.status == 'in_progress'
-    ).count()
-    
-    last_week_in_progress = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_last_week,
-        Inquiry.created_at <= end_of_last_week,
-        Inquiry.status == 'in_progress'
-    ).count()
-    
-    if last_week_in_progress > 0:
-        in_progress_change = ((this_week_in_progress - last_week_in_progress) / last_week_in_progress) * 100
-    else:
-        in_progress_change = 100 if this_week_in_progress > 0 else 0
-    
-    this_week_resolved = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_week,
-        Inquiry.status == 'resolved'
-    ).count()
-    
-    last_week_resolved = Inquiry.query.filter(
-        Inquiry.created_at >= start_of_last_week,
-        Inquiry.created_at <= end_of_last_week,
-        Inquiry.status == 'resolved'
-    ).count()
-    
-    if last_week_resolved > 0:
-        resolved_change = ((this_week_resolved - last_week_resolved) / last_week_resolved) * 100
-    else:
-        resolved_change = 100 if this_week_resolved > 0 else 0
-    
-    # Return all stats
-    return {
-        'total': total,
-        'pending': pending,
-        'in_progress': in_progress,
-        'resolved': resolved,
-        'total_change': round(total_change),
-        'pending_change': round(pending_change),
-        'in_progress_change': round(in_progress_change),
-        'resolved_change': round(resolved_change)
-    }
-
 @admin_bp.route('/admin/inquiry/<int:inquiry_id>')
 @login_required
 def view_inquiry_details(inquiry_id):
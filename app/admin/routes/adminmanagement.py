@@ -1,6 +1,6 @@
 from app.models import Inquiry, InquiryMessage, User, Office, db, OfficeAdmin, Student, CounselingSession, StudentActivityLog, SuperAdminActivityLog, OfficeLoginLog, AuditLog
 from flask import Blueprint, redirect, url_for, render_template, jsonify, request, flash, Response, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.passwords import hash_password
 from flask_login import login_required, current_user
 from flask_socketio import emit
 from app import socketio
@@ -10,6 +10,9 @@ from sqlalchemy import func, case, or_
 import random
 import os
 from app.admin import admin_bp
+from app.services.dashboard_stats import realtime_stats_payload, compute_admin_management_stats
+from app.websockets.admin_sockets import emit_admin_stats_update
+from app.services.name_cache import get_user_short_name
 
 ############################################## ADMIN MANAGE #############################################
 
@@ -23,28 +26,25 @@ def adminmanage():
     offices = Office.query.all()
     office_admins = User.query.filter_by(role='office_admin').all()
     
-    total_offices = len(offices)
-    active_office_admins = User.query.filter_by(role='office_admin', is_active=True).count()
-    unassigned_offices = Office.query.filter(~Office.office_admins.any()).count()
-    unassigned_admins = User.query.filter_by(role='office_admin').filter(~User.office_admin.has()).count()
+    stats = compute_admin_management_stats()
     
     # Log super admin activity
     SuperAdminActivityLog.log_action(
         super_admin=current_user,
         action="View Admin Management",
         target_type="system",
-        details="Accessed admin management interface"
+        details="Accessed admin management interface",
+        buffered=True
     )
-    db.session.commit()
     
     return render_template(
         'admin/adminmanage.html',
         offices=offices,
         office_admins=office_admins,
-        total_offices=total_offices,
-        active_office_admins=active_office_admins,
-        unassigned_offices=unassigned_offices,
-        unassigned_admins=unassigned_admins
+        total_offices=stats['total_offices'],
+        active_office_admins=stats['active_office_admins'],
+        unassigned_offices=stats['unassigned_offices'],
+        unassigned_admins=stats['unassigned_admins']
     )
 
 @admin_bp.route('/api/office/<int:office_id>/admins')
@@ -112,9 +112,6 @@ def remove_office_admin():
         
         db.session.commit()
         
-        # Get updated stats
-        unassigned_admins = User.query.filter_by(role='office_admin').filter(~User.office_admin.has()).count()
-        
         # Emit WebSocket event for office assignment removal
         socketio.emit('office_admin_removed', {
             'admin_id': admin_id,
@@ -124,9 +121,7 @@ def remove_office_admin():
         }, room='super_admin_room')
         
         # Update the dashboard stats
-        socketio.emit('dashboard_stats_update', {
-            'unassigned_admins': unassigned_admins
-        }, room='super_admin_room')
+        emit_admin_stats_update()
         
         return jsonify({
             'success': True, 
@@ -189,7 +184,7 @@ def add_admin():
             middle_name=middle_name,
             last_name=last_name,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=hash_password(password),
             role='office_admin',
             is_active=is_active,
             profile_pic=profile_pic_path
@@ -220,19 +215,8 @@ def add_admin():
         
         db.session.commit()
         
-        # Get updated stats to reflect the new admin
-        total_offices = Office.query.count()
-        active_office_admins = User.query.filter_by(role='office_admin', is_active=True).count()
-        unassigned_offices = Office.query.filter(~Office.office_admins.any()).count()
-        unassigned_admins = User.query.filter_by(role='office_admin').filter(~User.office_admin.has()).count()
-        
         # Emit stats update via WebSocket
-        socketio.emit('dashboard_stats_update', {
-            'total_offices': total_offices,
-            'active_office_admins': active_office_admins,
-            'unassigned_offices': unassigned_offices,
-            'unassigned_admins': unassigned_admins
-        }, room='super_admin_room')
+        emit_admin_stats_update()
         
         # Emit WebSocket event for admin table update
         socketio.emit('admin_added', {
@@ -336,22 +320,11 @@ def delete_admin():
         db.session.delete(admin)
         db.session.commit()
         
-        # Get updated stats
-        total_offices = Office.query.count()
-        active_office_admins = User.query.filter_by(role='office_admin', is_active=True).count()
-        unassigned_offices = Office.query.filter(~Office.office_admins.any()).count()
-        unassigned_admins = User.query.filter_by(role='office_admin').filter(~User.office_admin.has()).count()
-        
         # Emit WebSocket event for admin deletion
         socketio.emit('admin_deleted', admin_info, room='super_admin_room')
         
         # Update the dashboard stats
-        socketio.emit('dashboard_stats_update', {
-            'total_offices': total_offices,
-            'active_office_admins': active_office_admins,
-            'unassigned_offices': unassigned_offices,
-            'unassigned_admins': unassigned_admins
-        }, room='super_admin_room')
+        emit_admin_stats_update()
         
         flash('Admin deleted successfully', 'success')
     except Exception as e:
@@ -471,10 +444,6 @@ def update_admin():
         
         db.session.commit()
         
-        # Get updated stats
-        active_office_admins = User.query.filter_by(role='office_admin', is_active=True).count()
-        unassigned_admins = User.query.filter_by(role='office_admin').filter(~User.office_admin.has()).count()
-        
         # Send a single comprehensive update event
         socketio.emit('admin_updated', {
             'id': admin.id,
@@ -490,10 +459,7 @@ def update_admin():
         }, room='super_admin_room')
         
         # Update the dashboard stats
-        socketio.emit('dashboard_stats_update', {
-            'active_office_admins': active_office_admins,
-            'unassigned_admins': unassigned_admins
-        }, room='super_admin_room')
+        emit_admin_stats_update()
         
         return jsonify({'success': True, 'message': 'Admin updated successfully'})
         
@@ -521,7 +487,7 @@ def reset_admin_password():
         # Reset to a simple default password
         default_password = 'kapiyuadmin'  # Or generate a random one as in your original code
         
-        admin.password_hash = generate_password_hash(default_password)
+        admin.password_hash = hash_password(default_password)
         
         # Log action
         SuperAdminActivityLog.log_action(
@@ -572,26 +538,7 @@ def get_admin_dashboard_stats():
         return jsonify({'success': False, 'message': 'Unauthorized access'}), 403
     
     try:
-        # Get real-time statistics
-        active_users = User.query.filter_by(is_active=True).count()
-        pending_inquiries = Inquiry.query.filter_by(status='pending').count()
-        upcoming_sessions = CounselingSession.query.filter(
-            CounselingSession.scheduled_at > datetime.utcnow(),
-            CounselingSession.status == 'scheduled'
-        ).count()
-        
-        # Get office activity
-        offices = Office.query.all()
-        office_activity = []
-        for office in offices:
-            inquiries_count = Inquiry.query.filter_by(office_id=office.id).count()
-            sessions_count = CounselingSession.query.filter_by(office_id=office.id).count()
-            office_activity.append({
-                'office_id': office.id,
-                'office_name': office.name,
-                'inquiries_count': inquiries_count,
-                'sessions_count': sessions_count
-            })
+        stats = realtime_stats_payload()
         
         # Get recent activities
         recent_admin_logs = SuperAdminActivityLog.query.order_by(
@@ -600,8 +547,7 @@ def get_admin_dashboard_stats():
         
         recent_activities = []
         for log in recent_admin_logs:
-            admin = User.query.get(log.super_admin_id)
-            admin_name = f"{admin.first_name} {admin.last_name}" if admin else "Unknown Admin"
+            admin_name = get_user_short_name(log.super_admin_id, "Unknown Admin")
             
             recent_activities.append({
                 'admin_name': admin_name,
@@ -614,12 +560,12 @@ def get_admin_dashboard_stats():
         return jsonify({
             'success': True,
             'stats': {
-                'active_users': active_users,
-                'pending_inquiries': pending_inquiries,
-                'upcoming_sessions': upcoming_sessions,
-                'office_activity': office_activity,
+                'active_users': stats['active_users'],
+                'pending_inquiries': stats['pending_inquiries'],
+                'upcoming_sessions': stats['upcoming_sessions'],
+                'office_activity': stats['office_activity'],
                 'recent_activities': recent_activities,
-                'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+                'timestamp': stats['timestamp']
             }
         })
     
@@ -642,9 +588,9 @@ def handle_join_admin_room():
                 super_admin=current_user,
                 action="WebSocket Connect",
                 target_type="system",
-                details="Super admin real-time dashboard connection"
+                details="Super admin real-time dashboard connection",
+                buffered=True
             )
-            db.session.commit()
             
         print(f"Admin {current_user.email} joined admin_room")
         
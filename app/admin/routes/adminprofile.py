@@ -1,6 +1,6 @@
 from app.models import Inquiry, InquiryMessage, User, Office, db, OfficeAdmin, Student, CounselingSession, StudentActivityLog, SuperAdminActivityLog, OfficeLoginLog, AuditLog
 from flask import Blueprint, redirect, url_for, render_template, jsonify, request, flash, Response
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.passwords import hash_password, verify_password
 from flask_login import login_required, current_user
 from flask_socketio import emit
 from app import socketio
@@ -144,11 +144,11 @@ def change_password():
             flash('New passwords do not match', 'error')
             return redirect(url_for('admin.dashboard'))
         
-        if not check_password_hash(current_user.password_hash, current_password):
+        if not verify_password(current_user.password_hash, current_password):
             flash('Current password is incorrect', 'error')
             return redirect(url_for('admin.dashboard'))
         
-        current_user.password_hash = generate_password_hash(new_password)
+        current_user.password_hash = hash_password(new_password)
         db.session.commit()
         
         flash('Password changed successfully', 'success')
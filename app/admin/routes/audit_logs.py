@@ -1,18 +1,221 @@
-from app.models import Inquiry, InquiryMessage, User, Office, db, OfficeAdmin, Student, CounselingSession, StudentActivityLog, SuperAdminActivityLog, OfficeLoginLog, AuditLog
-from flask import Blueprint, redirect, url_for, render_template, jsonify, request, flash, Response
+from app.models import Inquiry, InquiryMessage, User, Office, db, OfficeAdmin, Student, CounselingSession, StudentActivityLog, SuperAdminActivityLog, OfficeLoginLog, AuditLog, StatsCounter
+from flask import Blueprint, redirect, url_for, render_template, jsonify, request, flash, Response, stream_with_context, send_file, current_app
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_required, current_user
 from flask_socketio import emit
 from app import socketio
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-from sqlalchemy import func, case, or_
+from sqlalchemy import func, case, or_, literal, select, String, union_all
+import json
 import random
 import os
 from app.admin import admin_bp
+from app.services.keyset import paginate_keyset, paginate_timeline, paginate_by_id, approximate_row_count
+from app.services import export_jobs, log_archive
+from app.services.retention import LOG_TABLES
+from app.services.search import text_match, matching_user_ids, matching_student_ids, matching_office_admin_ids
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
 
 ################################# AUDIT LOGS ###############################################
 
+AUDIT_LOGS_PER_PAGE = 10
+EXPORT_BATCH_SIZE = 1000
+EXCEL_MAX_ROWS = 1048576  # Excel's per-sheet row limit, header included
+PDF_TABLE_ROWS = 200
+PDF_MAX_ROWS = 20000  # Rows per PDF job; the document is built in memory
+PDF_EXCLUDED_COLUMNS = ('Details',)
+ARCHIVE_SEARCH_LIMIT = 500
+LOG_FILTER_ARGS = ('date_from', 'date_to', 'action', 'status', 'role')
+TIMELINE_SOURCES = {
+    'audit': 'Audit',
+    'office': 'Office Login',
+    'student': 'Student',
+    'superadmin': 'Super Admin',
+}
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+def apply_log_filters(query, timestamp_column, action_column=None, success_column=None, role_column=None, args=None):
+    """
+    Push the filter form's date range, action, status and role into the SQL query.
+    
+    :param query: The log query to filter
+    :param timestamp_column: Column the date range applies to
+    :param action_column: Column matched against the action filter, if the log has one
+    :param success_column: Boolean success column, if the log has one
+    :param role_column: Actor role column, if the log has one
+    :param args: Query-string arguments to use instead of the current request's
+    """
+    args = request.args if args is None else args
+    date_from = _parse_date(args.get('date_from'))
+    date_to = _parse_date(args.get('date_to'))
+    action = args.get('action', '').strip()
+    status = args.get('status')
+    role = args.get('role')
+    
+    if date_from:
+        query = query.filter(timestamp_column >= date_from)
+    if date_to:
+        query = query.filter(timestamp_column < date_to + timedelta(days=1))
+    if action and action_column is not None:
+        query = query.filter(text_match(action, action_column))
+    if status in ('success', 'failed') and success_column is not None:
+        query = query.filter(success_column == (status == 'success'))
+    if role and role_column is not None:
+        query = query.filter(role_column == role)
+    return query
+
+
+def log_search_condition(log_type, search_query):
+    """
+    Search condition for a log type, built from indexed columns of the log table itself.
+    
+    Names and emails are matched in the users table first (see app/services/search.py),
+    so the log is filtered by actor id instead of an OR across the join.
+    """
+    if log_type == 'student':
+        return or_(
+            StudentActivityLog.student_id.in_(matching_student_ids(search_query)),
+            text_match(search_query, StudentActivityLog.action)
+        )
+    elif log_type == 'office':
+        return OfficeLoginLog.office_admin_id.in_(matching_office_admin_ids(search_query))
+    elif log_type == 'superadmin':
+        return or_(
+            SuperAdminActivityLog.super_admin_id.in_(matching_user_ids(search_query)),
+            text_match(search_query, SuperAdminActivityLog.action, SuperAdminActivityLog.target_type)
+        )
+    return or_(
+        AuditLog.actor_id.in_(matching_user_ids(search_query)),
+        text_match(search_query, AuditLog.action, AuditLog.target_type)
+    )
+
+
+def timeline_branches(search_query, args=None):
+    """
+    One query per log table over the timeline's common projection, with the search and filters applied.
+    
+    Every branch selects timestamp, source, id, first_name, last_name, email, role, action,
+    target_type, is_success and ip_address. Office logins have no action or role column, so
+    constants stand in for them and the action and role filters still apply to every branch.
+    
+    :return: List of (query, timestamp column, id column, source) for paginate_timeline
+    """
+    args = request.args if args is None else args
+    
+    def source(name):
+        return literal(name, String).label('source')
+    
+    branches = []
+    
+    audit_query = db.session.query(
+        AuditLog.timestamp.label('timestamp'), source('audit'), AuditLog.id.label('id'),
+        User.first_name, User.last_name, User.email, AuditLog.actor_role.label('role'),
+        AuditLog.action.label('action'), AuditLog.target_type.label('target_type'),
+        AuditLog.is_success.label('is_success'), AuditLog.ip_address.label('ip_address')
+    ).outerjoin(
+        User, AuditLog.actor_id == User.id
+    )
+    if search_query:
+        audit_query = audit_query.filter(log_search_condition('all', search_query))
+    audit_query = apply_log_filters(
+        audit_query, AuditLog.timestamp, action_column=AuditLog.action,
+        success_column=AuditLog.is_success, role_column=AuditLog.actor_role, args=args
+    )
+    branches.append((audit_query, AuditLog.timestamp, AuditLog.id, 'audit'))
+    
+    office_action = literal('Login', String)
+    office_role = literal('office_admin', String)
+    office_query = db.session.query(
+        OfficeLoginLog.login_time.label('timestamp'), source('office'), OfficeLoginLog.id.label('id'),
+        User.first_name, User.last_name, User.email, office_role.label('role'),
+        office_action.label('action'), literal(None, String).label('target_type'),
+        OfficeLoginLog.is_success.label('is_success'), OfficeLoginLog.ip_address.label('ip_address')
+    ).join(
+        OfficeAdmin, OfficeLoginLog.office_admin_id == OfficeAdmin.id
+    ).join(
+        User, OfficeAdmin.user_id == User.id
+    )
+    if search_query:
+        office_query = office_query.filter(log_search_condition('office', search_query))
+    office_query = apply_log_filters(
+        office_query, OfficeLoginLog.login_time, action_column=office_action,
+        success_column=OfficeLoginLog.is_success, role_column=office_role, args=args
+    )
+    branches.append((office_query, OfficeLoginLog.login_time, OfficeLoginLog.id, 'office'))
+    
+    student_role = literal('student', String)
+    student_query = db.session.query(
+        StudentActivityLog.timestamp.label('timestamp'), source('student'), StudentActivityLog.id.label('id'),
+        User.first_name, User.last_name, User.email, student_role.label('role'),
+        StudentActivityLog.action.label('action'), StudentActivityLog.related_type.label('target_type'),
+        StudentActivityLog.is_success.label('is_success'), StudentActivityLog.ip_address.label('ip_address')
+    ).join(
+        Student, StudentActivityLog.student_id == Student.id
+    ).join(
+        User, Student.user_id == User.id
+    )
+    if search_query:
+        student_query = student_query.filter(log_search_condition('student', search_query))
+    student_query = apply_log_filters(
+        student_query, StudentActivityLog.timestamp, action_column=StudentActivityLog.action,
+        success_column=StudentActivityLog.is_success, role_column=student_role, args=args
+    )
+    branches.append((student_query, StudentActivityLog.timestamp, StudentActivityLog.id, 'student'))
+    
+    superadmin_role = literal('super_admin', String)
+    superadmin_query = db.session.query(
+        SuperAdminActivityLog.timestamp.label('timestamp'), source('superadmin'), SuperAdminActivityLog.id.label('id'),
+        User.first_name, User.last_name, User.email, superadmin_role.label('role'),
+        SuperAdminActivityLog.action.label('action'), SuperAdminActivityLog.target_type.label('target_type'),
+        SuperAdminActivityLog.is_success.label('is_success'), SuperAdminActivityLog.ip_address.label('ip_address')
+    ).outerjoin(
+        User, SuperAdminActivityLog.super_admin_id == User.id
+    )
+    if search_query:
+        superadmin_query = superadmin_query.filter(log_search_condition('superadmin', search_query))
+    superadmin_query = apply_log_filters(
+        superadmin_query, SuperAdminActivityLog.timestamp, action_column=SuperAdminActivityLog.action,
+        success_column=SuperAdminActivityLog.is_success, role_column=superadmin_role, args=args
+    )
+    branches.append((superadmin_query, SuperAdminActivityLog.timestamp, SuperAdminActivityLog.id, 'superadmin'))
+    
+    return branches
+
+
+def has_log_filters(search_query):
+    """True when the current page is narrowed by a search or filter, so a table-wide total would mislead"""
+    return bool(search_query) or any(request.args.get(arg) for arg in LOG_FILTER_ARGS)
+
+
+def log_view_args(filter_type, search_query):
+    """Query-string arguments the pagination links must carry to stay on the same filtered view"""
+    args = {'filter_type': filter_type}
+    if search_query:
+        args['search'] = search_query
+    for arg in LOG_FILTER_ARGS:
+        if request.args.get(arg):
+            args[arg] = request.args.get(arg)
+    return args
+
+
+def with_current_cursor(args, cursor_arg):
+    """Copy of pagination link arguments that also keeps the current page of the view's other paginated list"""
+    args = dict(args)
+    if request.args.get(cursor_arg):
+        args[cursor_arg] = request.args.get(cursor_arg)
+    return args
+
 @admin_bp.route('/audit-logs')
 @login_required
 def audit_logs():
@@ -29,10 +232,124 @@ def audit_logs():
         return handle_office_logs(search_query)
     elif filter_type == 'superadmin':
         return handle_superadmin_logs(search_query)
+    elif filter_type == 'timeline':
+        return handle_timeline_logs(search_query)
     else:  # 'all' or any other value
         return handle_all_logs(search_query)
 
 
+def student_summary_query(student_ids):
+    """
+    Inquiry and counseling session counts of the given students.
+    
+    Each child table is aggregated on its own before the join, so a student's
+    inquiries and sessions are never multiplied against each other. Only the
+    given students are aggregated, so the cost follows the page, not the tables.
+    """
+    inquiry_counts = db.session.query(
+        Inquiry.student_id.label('student_id'),
+        func.count(Inquiry.id).label('total_inquiries'),
+        func.sum(case((Inquiry.status == 'pending', 1), else_=0)).label('active_inquiries')
+    ).filter(
+        Inquiry.student_id.in_(student_ids)
+    ).group_by(
+        Inquiry.student_id
+    ).subquery()
+    
+    session_counts = db.session.query(
+        CounselingSession.student_id.label('student_id'),
+        func.count(CounselingSession.id).label('counseling_sessions')
+    ).filter(
+        CounselingSession.student_id.in_(student_ids)
+    ).group_by(
+        CounselingSession.student_id
+    ).subquery()
+    
+    return db.session.query(
+        User,
+        Student,
+        func.coalesce(inquiry_counts.c.total_inquiries, 0).label('total_inquiries'),
+        func.coalesce(inquiry_counts.c.active_inquiries, 0).label('active_inquiries'),
+        func.coalesce(session_counts.c.counseling_sessions, 0).label('counseling_sessions')
+    ).join(
+        Student, User.id == Student.user_id
+    ).outerjoin(
+        inquiry_counts, Student.id == inquiry_counts.c.student_id
+    ).outerjoin(
+        session_counts, Student.id == session_counts.c.student_id
+    ).filter(
+        Student.id.in_(student_ids)
+    ).order_by(
+        Student.id
+    )
+
+
+def student_summary_page(cursor=None):
+    """
+    One page of the student summary, covering every student whether or not they have any activity.
+    
+    Students are paged on their primary key, then only that page's students are summarised.
+    """
+    students = paginate_by_id(
+        db.session.query(Student.id), Student.id,
+        key=lambda row: row.id,
+        cursor=cursor,
+        per_page=AUDIT_LOGS_PER_PAGE,
+        approx_total=approximate_row_count(Student)
+    )
+    students.items = student_summary_query([row.id for row in students.items]).all()
+    return students
+
+
+def office_summary_query(office_ids):
+    """
+    Inquiry and counseling session counts of the given offices.
+    
+    Read from the stats_counters rows kept in step with every status change
+    (see app/services/stats_counters.py), a handful of rows per office, instead
+    of counting the inquiry and session tables.
+    """
+    is_inquiry = StatsCounter.subject == 'inquiry'
+    counts = db.session.query(
+        StatsCounter.office_id.label('office_id'),
+        func.sum(case((is_inquiry, StatsCounter.count), else_=0)).label('total_inquiries'),
+        func.sum(case((is_inquiry & (StatsCounter.status == 'pending'), StatsCounter.count), else_=0)).label('pending_inquiries'),
+        func.sum(case((is_inquiry & (StatsCounter.status == 'resolved'), StatsCounter.count), else_=0)).label('resolved_inquiries'),
+        func.sum(case((StatsCounter.subject == 'session', StatsCounter.count), else_=0)).label('counseling_sessions')
+    ).filter(
+        StatsCounter.office_id.in_(office_ids)
+    ).group_by(
+        StatsCounter.office_id
+    ).subquery()
+    
+    return db.session.query(
+        Office,
+        func.coalesce(counts.c.total_inquiries, 0).label('total_inquiries'),
+        func.coalesce(counts.c.pending_inquiries, 0).label('pending_inquiries'),
+        func.coalesce(counts.c.resolved_inquiries, 0).label('resolved_inquiries'),
+        func.coalesce(counts.c.counseling_sessions, 0).label('counseling_sessions')
+    ).outerjoin(
+        counts, Office.id == counts.c.office_id
+    ).filter(
+        Office.id.in_(office_ids)
+    ).order_by(
+        Office.id
+    )
+
+
+def office_summary_page(cursor=None):
+    """One page of the office summary, covering every office; offices are paged on their primary key"""
+    offices = paginate_by_id(
+        db.session.query(Office.id), Office.id,
+        key=lambda row: row.id,
+        cursor=cursor,
+        per_page=AUDIT_LOGS_PER_PAGE,
+        approx_total=approximate_row_count(Office)
+    )
+    offices.items = office_summary_query([row.id for row in offices.items]).all()
+    return offices
+
+
 def handle_student_logs(search_query):
     """Handle student activity logs filtering and display"""
     student_logs_query = db.session.query(
@@ -41,37 +358,29 @@ def handle_student_logs(search_query):
         Student, StudentActivityLog.student_id == Student.id
     ).join(
         User, Student.user_id == User.id
-    ).order_by(StudentActivityLog.timestamp.desc())
+    )
     
     if search_query:
-        student_logs_query = student_logs_query.filter(
-            or_(
-                User.first_name.ilike(f'%{search_query}%'),
-                User.last_name.ilike(f'%{search_query}%'),
-                User.email.ilike(f'%{search_query}%'),
-                StudentActivityLog.action.ilike(f'%{search_query}%')
-            )
-        )
+        student_logs_query = student_logs_query.filter(log_search_condition('student', search_query))
     
-    students_query = db.session.query(
-        User,
-        Student,
-        func.count(Inquiry.id).label('total_inquiries'),
-        func.sum(case((Inquiry.status == 'pending', 1), else_=0)).label('active_inquiries'),
-        func.count(CounselingSession.id).label('counseling_sessions')
-    ).join(
-        Student, User.id == Student.user_id
-    ).outerjoin(
-        Inquiry, Student.id == Inquiry.student_id
-    ).outerjoin(
-        CounselingSession, Student.id == CounselingSession.student_id
-    ).group_by(
-        User.id, Student.id
+    student_logs_query = apply_log_filters(
+        student_logs_query, StudentActivityLog.timestamp,
+        action_column=StudentActivityLog.action, success_column=StudentActivityLog.is_success
+    )
+    paginated_logs = paginate_keyset(
+        student_logs_query, StudentActivityLog.timestamp, StudentActivityLog.id,
+        key=lambda row: (row[0].timestamp, row[0].id),
+        cursor=request.args.get('cursor'),
+        per_page=AUDIT_LOGS_PER_PAGE,
+        approx_total=None if has_log_filters(search_query) else approximate_row_count(StudentActivityLog)
     )
     
+    student_summary = student_summary_page(request.args.get('summary_cursor'))
+    page_args = log_view_args('student', search_query)
+    
     # Format student logs for display
     formatted_logs = []
-    for log, student, user in student_logs_query.all():
+    for log, student, user in paginated_logs.items:
         formatted_logs.append({
             'id': log.id,
             'student_name': f"{user.first_name} {user.last_name}",
@@ -84,8 +393,12 @@ def handle_student_logs(search_query):
         })
     
     return render_template('admin/audit_logs.html', 
-                          students=students_query.all(),
+                          students=student_summary.items,
                           student_logs=formatted_logs,
+                          pagination=paginated_logs,
+                          page_args=with_current_cursor(page_args, 'summary_cursor'),
+                          summary_pagination=student_summary,
+                          summary_args=with_current_cursor(page_args, 'cursor'),
                           filter_type='student',
                           search_query=search_query,
                           view_type='student')
@@ -101,35 +414,28 @@ def handle_office_logs(search_query):
         User, OfficeAdmin.user_id == User.id
     ).join(
         Office, OfficeAdmin.office_id == Office.id
-    ).order_by(OfficeLoginLog.login_time.desc())
+    )
     
     if search_query:
-        office_logs_query = office_logs_query.filter(
-            or_(
-                User.first_name.ilike(f'%{search_query}%'),
-                User.last_name.ilike(f'%{search_query}%'),
-                User.email.ilike(f'%{search_query}%'),
-                Office.name.ilike(f'%{search_query}%')
-            )
-        )
+        office_logs_query = office_logs_query.filter(log_search_condition('office', search_query))
     
-    offices_query = db.session.query(
-        Office,
-        func.count(Inquiry.id).label('total_inquiries'),
-        func.sum(case((Inquiry.status == 'pending', 1), else_=0)).label('pending_inquiries'),
-        func.sum(case((Inquiry.status == 'resolved', 1), else_=0)).label('resolved_inquiries'),
-        func.count(CounselingSession.id).label('counseling_sessions')
-    ).outerjoin(
-        Inquiry, Office.id == Inquiry.office_id
-    ).outerjoin(
-        CounselingSession, Office.id == CounselingSession.office_id
-    ).group_by(
-        Office.id
+    office_logs_query = apply_log_filters(
+        office_logs_query, OfficeLoginLog.login_time, success_column=OfficeLoginLog.is_success
+    )
+    paginated_logs = paginate_keyset(
+        office_logs_query, OfficeLoginLog.login_time, OfficeLoginLog.id,
+        key=lambda row: (row[0].login_time, row[0].id),
+        cursor=request.args.get('cursor'),
+        per_page=AUDIT_LOGS_PER_PAGE,
+        approx_total=None if has_log_filters(search_query) else approximate_row_count(OfficeLoginLog)
     )
     
+    office_summary = office_summary_page(request.args.get('summary_cursor'))
+    page_args = log_view_args('office', search_query)
+    
     # Format office logs for display
     formatted_logs = []
-    for log, office_admin, user, office in office_logs_query.all():
+    for log, office_admin, user, office in paginated_logs.items:
         formatted_logs.append({
             'id': log.id,
             'admin_name': f"{user.first_name} {user.last_name}",
@@ -143,8 +449,12 @@ def handle_office_logs(search_query):
         })
     
     return render_template('admin/audit_logs.html', 
-                          offices=offices_query.all(),
+                          offices=office_summary.items,
                           office_logs=formatted_logs,
+                          pagination=paginated_logs,
+                          page_args=with_current_cursor(page_args, 'summary_cursor'),
+                          summary_pagination=office_summary,
+                          summary_args=with_current_cursor(page_args, 'cursor'),
                           filter_type='office',
                           search_query=search_query,
                           view_type='office')
@@ -159,18 +469,22 @@ def handle_superadmin_logs(search_query):
         User.email.label('admin_email')
     ).outerjoin(
         User, SuperAdminActivityLog.super_admin_id == User.id
-    ).order_by(SuperAdminActivityLog.timestamp.desc())
+    )
     
     if search_query:
-        superadmin_logs_query = superadmin_logs_query.filter(
-            or_(
-                User.first_name.ilike(f'%{search_query}%'),
-                User.last_name.ilike(f'%{search_query}%'),
-                User.email.ilike(f'%{search_query}%'),
-                SuperAdminActivityLog.action.ilike(f'%{search_query}%'),
-                SuperAdminActivityLog.target_type.ilike(f'%{search_query}%')
-            )
-        )
+        superadmin_logs_query = superadmin_logs_query.filter(log_search_condition('superadmin', search_query))
+    
+    superadmin_logs_query = apply_log_filters(
+        superadmin_logs_query, SuperAdminActivityLog.timestamp,
+        action_column=SuperAdminActivityLog.action, success_column=SuperAdminActivityLog.is_success
+    )
+    paginated_logs = paginate_keyset(
+        superadmin_logs_query, SuperAdminActivityLog.timestamp, SuperAdminActivityLog.id,
+        key=lambda row: (row[0].timestamp, row[0].id),
+        cursor=request.args.get('cursor'),
+        per_page=AUDIT_LOGS_PER_PAGE,
+        approx_total=None if has_log_filters(search_query) else approximate_row_count(SuperAdminActivityLog)
+    )
     
     super_admins_query = db.session.query(
         User,
@@ -185,7 +499,7 @@ def handle_superadmin_logs(search_query):
     
     # Format super admin logs for display
     formatted_logs = []
-    for log_data in superadmin_logs_query.all():
+    for log_data in paginated_logs.items:
         log = log_data[0]  # Extract the actual log object
         formatted_logs.append({
             'id': log.id,
@@ -202,6 +516,8 @@ def handle_superadmin_logs(search_query):
     return render_template('admin/audit_logs.html', 
                           super_admins=super_admins_query.all(),
                           superadmin_logs=formatted_logs,
+                          pagination=paginated_logs,
+                          page_args=log_view_args('superadmin', search_query),
                           filter_type='superadmin',
                           search_query=search_query,
                           view_type='superadmin')
@@ -217,23 +533,24 @@ def handle_all_logs(search_query):
         User.role.label('user_role')
     ).outerjoin(
         User, AuditLog.actor_id == User.id
-    ).order_by(AuditLog.timestamp.desc())
+    )
     
     if search_query:
-        audit_logs_query = audit_logs_query.filter(
-            or_(
-                User.first_name.ilike(f'%{search_query}%'),
-                User.last_name.ilike(f'%{search_query}%'),
-                User.email.ilike(f'%{search_query}%'),
-                AuditLog.action.ilike(f'%{search_query}%'),
-                AuditLog.target_type.ilike(f'%{search_query}%')
-            )
-        )
+        audit_logs_query = audit_logs_query.filter(log_search_condition('all', search_query))
     
-    # Pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = 10
-    paginated_logs = audit_logs_query.paginate(page=page, per_page=per_page, error_out=False)
+    audit_logs_query = apply_log_filters(
+        audit_logs_query, AuditLog.timestamp, action_column=AuditLog.action,
+        success_column=AuditLog.is_success, role_column=AuditLog.actor_role
+    )
+    
+    # Cursor pagination on (timestamp, id); the total is only a planner estimate of the whole table
+    paginated_logs = paginate_keyset(
+        audit_logs_query, AuditLog.timestamp, AuditLog.id,
+        key=lambda row: (row[0].timestamp, row[0].id),
+        cursor=request.args.get('cursor'),
+        per_page=AUDIT_LOGS_PER_PAGE,
+        approx_total=None if has_log_filters(search_query) else approximate_row_count(AuditLog)
+    )
     
     # Format audit logs for display
     formatted_logs = []
@@ -254,11 +571,89 @@ def handle_all_logs(search_query):
     return render_template('admin/audit_logs.html', 
                           audit_logs=formatted_logs,
                           pagination=paginated_logs,
+                          page_args=log_view_args('all', search_query),
                           filter_type='all',
                           search_query=search_query,
                           view_type='all')
 
 
+def handle_timeline_logs(search_query):
+    """Handle the merged timeline of every log table"""
+    # Each table reads only its next page from its own (timestamp, id) index before the merge
+    paginated_logs = paginate_timeline(
+        timeline_branches(search_query),
+        cursor=request.args.get('cursor'),
+        per_page=AUDIT_LOGS_PER_PAGE
+    )
+    
+    formatted_logs = []
+    for row in paginated_logs.items:
+        formatted_logs.append({
+            'id': row.id,
+            'source': TIMELINE_SOURCES.get(row.source, row.source),
+            'user_name': _format_name(row.first_name, row.last_name),
+            'user_email': row.email,
+            'user_role': row.role,
+            'action': row.action,
+            'target_type': row.target_type,
+            'is_success': row.is_success,
+            'timestamp': row.timestamp,
+            'ip_address': row.ip_address
+        })
+    
+    return render_template('admin/audit_logs.html',
+                          timeline_logs=formatted_logs,
+                          pagination=paginated_logs,
+                          page_args=log_view_args('timeline', search_query),
+                          filter_type='timeline',
+                          search_query=search_query,
+                          view_type='timeline')
+
+
+@admin_bp.route('/audit-logs/archive')
+@login_required
+def audit_log_archive():
+    """Search the cold archive of log rows removed by retention, straight from the archive files"""
+    if current_user.role != 'super_admin':
+        flash('Unauthorized access', 'error')
+        return redirect(url_for('main.index'))
+    
+    timestamp_keys = {model.__tablename__: column.name for model, column in LOG_TABLES}
+    table = request.args.get('table')
+    if table not in timestamp_keys:
+        table = LOG_TABLES[0][0].__tablename__
+    search_query = request.args.get('search', '').strip()
+    months = log_archive.list_months(table)
+    
+    # Without a date range, search the newest archived month
+    date_from = _parse_date(request.args.get('date_from'))
+    date_to = _parse_date(request.args.get('date_to'))
+    if not date_to and months:
+        date_to = datetime.strptime(months[-1], '%Y-%m')
+        date_to = (date_to.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if not date_from and date_to:
+        date_from = date_to.replace(day=1)
+    
+    rows, truncated = [], False
+    if date_from and date_to:
+        rows, truncated = log_archive.search_archive(
+            table, timestamp_keys[table], date_from.date(), date_to.date(),
+            term=search_query, limit=ARCHIVE_SEARCH_LIMIT
+        )
+    
+    return render_template('admin/audit_log_archive.html',
+                          tables=list(timestamp_keys),
+                          table=table,
+                          months=months,
+                          rows=rows,
+                          columns=list(rows[0].keys()) if rows else [],
+                          truncated=truncated,
+                          limit=ARCHIVE_SEARCH_LIMIT,
+                          date_from=date_from,
+                          date_to=date_to,
+                          search_query=search_query)
+
+
 @admin_bp.route('/export-logs', methods=['GET'])
 @login_required
 def export_logs():
@@ -270,28 +665,46 @@ def export_logs():
     export_format = request.args.get('format', 'csv')
     log_type = request.args.get('type', 'all')
     
-    logs = get_logs_based_on_type_and_filters(log_type)
-    
-    if export_format == 'csv':
-        return export_logs_csv(logs, log_type)
+    if export_format in STREAMED_EXPORT_FORMATS:
+        return export_logs_streamed(log_type, export_format)
     elif export_format == 'excel':
-        return export_logs_excel(logs, log_type)
+        return export_logs_excel(log_type)
     elif export_format == 'pdf':
-        return export_logs_pdf(logs, log_type)
+        return export_logs_pdf(log_type)
     else:
         flash('Unsupported export format', 'error')
         return redirect(url_for('admin.audit_logs', filter_type=log_type))
 
 
-def get_logs_based_on_type_and_filters(log_type):
-    """Get logs based on type and applied filters."""
-    date_from = request.args.get('date_from')
-    date_to = request.args.get('date_to')
-    search_query = request.args.get('search', '')
+def _format_timestamp(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def _format_name(first_name, last_name, default='Unknown'):
+    return f"{first_name} {last_name}" if first_name else default
+
+
+def get_export_query(log_type, args=None):
+    """
+    Build the export select for a log type.
+    
+    Only the exported columns are selected, as a Core select() rather than ORM entities,
+    and the view's search and filters are applied in SQL. Every export format consumes
+    it through export_rows.
+    
+    :param log_type: 'student', 'office', 'superadmin', 'timeline' or 'all'
+    :param args: Query-string arguments to use instead of the current request's (background jobs)
+    :return: (header row, select statement, function turning a result row into an output row)
+    """
+    args = request.args if args is None else args
+    search_query = args.get('search', '')
     
     if log_type == 'student':
-        query = db.session.query(
-            StudentActivityLog, Student, User
+        headers = ['ID', 'Student Name', 'Email', 'Action', 'Related Type', 'Status', 'Timestamp', 'IP Address']
+        statement = select(
+            StudentActivityLog.id, User.first_name, User.last_name, User.email,
+            StudentActivityLog.action, StudentActivityLog.related_type, StudentActivityLog.is_success,
+            StudentActivityLog.timestamp, StudentActivityLog.ip_address
         ).join(
             Student, StudentActivityLog.student_id == Student.id
         ).join(
@@ -299,26 +712,31 @@ def get_logs_based_on_type_and_filters(log_type):
         )
         
         if search_query:
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(f'%{search_query}%'),
-                    User.last_name.ilike(f'%{search_query}%'),
-                    User.email.ilike(f'%{search_query}%'),
-                    StudentActivityLog.action.ilike(f'%{search_query}%')
-                )
-            )
-            
-        if date_from:
-            query = query.filter(StudentActivityLog.timestamp >= datetime.strptime(date_from, '%Y-%m-%d'))
+            statement = statement.filter(log_search_condition('student', search_query))
         
-        if date_to:
-            query = query.filter(StudentActivityLog.timestamp <= datetime.strptime(date_to + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
-            
-        return query.order_by(StudentActivityLog.timestamp.desc()).all()
+        statement = apply_log_filters(
+            statement, StudentActivityLog.timestamp,
+            action_column=StudentActivityLog.action, success_column=StudentActivityLog.is_success, args=args
+        ).order_by(StudentActivityLog.timestamp.desc(), StudentActivityLog.id.desc())
         
+        def format_row(row):
+            return [
+                row.id,
+                _format_name(row.first_name, row.last_name),
+                row.email,
+                row.action,
+                row.related_type or '',
+                'Success' if row.is_success else 'Failed',
+                _format_timestamp(row.timestamp),
+                row.ip_address or ''
+            ]
+    
     elif log_type == 'office':
-        query = db.session.query(
-            OfficeLoginLog, OfficeAdmin, User, Office
+        headers = ['ID', 'Admin Name', 'Email', 'Office', 'Login Time', 'Logout Time', 'Duration (sec)', 'Status', 'IP Address']
+        statement = select(
+            OfficeLoginLog.id, User.first_name, User.last_name, User.email,
+            Office.name.label('office_name'), OfficeLoginLog.login_time, OfficeLoginLog.logout_time,
+            OfficeLoginLog.session_duration, OfficeLoginLog.is_success, OfficeLoginLog.ip_address
         ).join(
             OfficeAdmin, OfficeLoginLog.office_admin_id == OfficeAdmin.id
         ).join(
@@ -328,318 +746,237 @@ def get_logs_based_on_type_and_filters(log_type):
         )
         
         if search_query:
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(f'%{search_query}%'),
-                    User.last_name.ilike(f'%{search_query}%'),
-                    User.email.ilike(f'%{search_query}%'),
-                    Office.name.ilike(f'%{search_query}%')
-                )
-            )
-            
-        if date_from:
-            query = query.filter(OfficeLoginLog.login_time >= datetime.strptime(date_from, '%Y-%m-%d'))
+            statement = statement.filter(log_search_condition('office', search_query))
         
-        if date_to:
-            query = query.filter(OfficeLoginLog.login_time <= datetime.strptime(date_to + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
-            
-        return query.order_by(OfficeLoginLog.login_time.desc()).all()
+        statement = apply_log_filters(
+            statement, OfficeLoginLog.login_time, success_column=OfficeLoginLog.is_success, args=args
+        ).order_by(OfficeLoginLog.login_time.desc(), OfficeLoginLog.id.desc())
         
+        def format_row(row):
+            return [
+                row.id,
+                _format_name(row.first_name, row.last_name),
+                row.email,
+                row.office_name,
+                _format_timestamp(row.login_time),
+                _format_timestamp(row.logout_time),
+                row.session_duration or '',
+                'Success' if row.is_success else 'Failed',
+                row.ip_address or ''
+            ]
+    
     elif log_type == 'superadmin':
-        query = db.session.query(
-            SuperAdminActivityLog, User
+        headers = ['ID', 'Admin Name', 'Email', 'Action', 'Target Type', 'Details', 'Status', 'Timestamp', 'IP Address']
+        statement = select(
+            SuperAdminActivityLog.id, User.first_name, User.last_name, User.email,
+            SuperAdminActivityLog.action, SuperAdminActivityLog.target_type, SuperAdminActivityLog.details,
+            SuperAdminActivityLog.is_success, SuperAdminActivityLog.timestamp, SuperAdminActivityLog.ip_address
         ).outerjoin(
             User, SuperAdminActivityLog.super_admin_id == User.id
         )
         
         if search_query:
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(f'%{search_query}%'),
-                    User.last_name.ilike(f'%{search_query}%'),
-                    User.email.ilike(f'%{search_query}%'),
-                    SuperAdminActivityLog.action.ilike(f'%{search_query}%'),
-                    SuperAdminActivityLog.target_type.ilike(f'%{search_query}%')
-                )
-            )
-            
-        if date_from:
-            query = query.filter(SuperAdminActivityLog.timestamp >= datetime.strptime(date_from, '%Y-%m-%d'))
+            statement = statement.filter(log_search_condition('superadmin', search_query))
         
-        if date_to:
-            query = query.filter(SuperAdminActivityLog.timestamp <= datetime.strptime(date_to + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
-            
-        return query.order_by(SuperAdminActivityLog.timestamp.desc()).all()
+        statement = apply_log_filters(
+            statement, SuperAdminActivityLog.timestamp,
+            action_column=SuperAdminActivityLog.action, success_column=SuperAdminActivityLog.is_success, args=args
+        ).order_by(SuperAdminActivityLog.timestamp.desc(), SuperAdminActivityLog.id.desc())
         
+        def format_row(row):
+            return [
+                row.id,
+                _format_name(row.first_name, row.last_name),
+                row.email or '',
+                row.action,
+                row.target_type or '',
+                row.details or '',
+                'Success' if row.is_success else 'Failed',
+                _format_timestamp(row.timestamp),
+                row.ip_address or ''
+            ]
+    
+    elif log_type == 'timeline':
+        headers = ['Source', 'ID', 'User', 'Email', 'Role', 'Action', 'Target Type', 'Status', 'Timestamp', 'IP Address']
+        merged = union_all(
+            *(branch.statement for branch, _, _, _ in timeline_branches(search_query, args))
+        ).subquery()
+        statement = select(merged).order_by(
+            merged.c.timestamp.desc(), merged.c.source.desc(), merged.c.id.desc()
+        )
+        
+        def format_row(row):
+            return [
+                TIMELINE_SOURCES.get(row.source, row.source),
+                row.id,
+                _format_name(row.first_name, row.last_name),
+                row.email or '',
+                row.role or '',
+                row.action,
+                row.target_type or '',
+                'Success' if row.is_success else 'Failed',
+                _format_timestamp(row.timestamp),
+                row.ip_address or ''
+            ]
+    
     else:  # 'all' or any other value
-        query = db.session.query(
-            AuditLog, User
+        headers = ['ID', 'User', 'Role', 'Action', 'Target Type', 'Status', 'Timestamp', 'IP Address']
+        statement = select(
+            AuditLog.id, User.first_name, User.last_name, User.role,
+            AuditLog.action, AuditLog.target_type, AuditLog.is_success,
+            AuditLog.timestamp, AuditLog.ip_address
         ).outerjoin(
             User, AuditLog.actor_id == User.id
         )
         
         if search_query:
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(f'%{search_query}%') if User else False,
-                    User.last_name.ilike(f'%{search_query}%') if User else False,
-                    User.email.ilike(f'%{search_query}%') if User else False,
-                    AuditLog.action.ilike(f'%{search_query}%'),
-                    AuditLog.target_type.ilike(f'%{search_query}%')
-                )
-            )
-            
-        if date_from:
-            query = query.filter(AuditLog.timestamp >= datetime.strptime(date_from, '%Y-%m-%d'))
+            statement = statement.filter(log_search_condition('all', search_query))
         
-        if date_to:
-            query = query.filter(AuditLog.timestamp <= datetime.strptime(date_to + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
-            
-        return query.order_by(AuditLog.timestamp.desc()).all()
+        statement = apply_log_filters(
+            statement, AuditLog.timestamp, action_column=AuditLog.action,
+            success_column=AuditLog.is_success, role_column=AuditLog.actor_role, args=args
+        ).order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+        
+        def format_row(row):
+            return [
+                row.id,
+                _format_name(row.first_name, row.last_name),
+                row.role or '',
+                row.action,
+                row.target_type or '',
+                'Success' if row.is_success else 'Failed',
+                _format_timestamp(row.timestamp),
+                row.ip_address or ''
+            ]
+    
+    return headers, statement, format_row
 
 
-def export_logs_csv(logs, log_type):
-    """Export logs as CSV file."""
+def export_rows(statement, format_row):
+    """
+    Run an export select and yield plain output rows.
+    
+    Rows come from a server-side cursor in batches of EXPORT_BATCH_SIZE as lightweight
+    tuples, without ORM entities or the identity map.
+    """
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in result:
+        yield format_row(row)
+
+
+def write_csv(headers, rows):
+    """Yield CSV text, one chunk per EXPORT_BATCH_SIZE rows"""
     import csv
     from io import StringIO
     
     output = StringIO()
     writer = csv.writer(output)
+    writer.writerow(headers)
     
-    if log_type == 'student':
-        writer.writerow(['ID', 'Student Name', 'Email', 'Action', 'Related Type', 'Status', 'Timestamp', 'IP Address'])
-        
-        for log, student, user in logs:
-            writer.writerow([
-                log.id,
-                f"{user.first_name} {user.last_name}",
-                user.email,
-                log.action,
-                log.related_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-            
-    elif log_type == 'office':
-        writer.writerow(['ID', 'Admin Name', 'Email', 'Office', 'Login Time', 'Logout Time', 'Duration (sec)', 'Status', 'IP Address'])
-        
-        for log, office_admin, user, office in logs:
-            writer.writerow([
-                log.id,
-                f"{user.first_name} {user.last_name}",
-                user.email,
-                office.name,
-                log.login_time.strftime('%Y-%m-%d %H:%M:%S'),
-                log.logout_time.strftime('%Y-%m-%d %H:%M:%S') if log.logout_time else '',
-                log.session_duration or '',
-                'Success' if log.is_success else 'Failed',
-                log.ip_address or ''
-            ])
-            
-    elif log_type == 'superadmin':
-        writer.writerow(['ID', 'Admin Name', 'Email', 'Action', 'Target Type', 'Details', 'Status', 'Timestamp', 'IP Address'])
-        
-        for log, user in logs:
-            writer.writerow([
-                log.id,
-                f"{user.first_name} {user.last_name}" if user else 'Unknown',
-                user.email if user else '',
-                log.action,
-                log.target_type or '',
-                log.details or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-            
-    else:  # 'all' or any other value
-        writer.writerow(['ID', 'User', 'Role', 'Action', 'Target Type', 'Status', 'Timestamp', 'IP Address'])
-        
-        for log, user in logs:
-            writer.writerow([
-                log.id,
-                f"{user.first_name} {user.last_name}" if user else 'Unknown',
-                user.role if user else '',
-                log.action,
-                log.target_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
     
-    output.seek(0)
+    yield output.getvalue()
+
+
+def write_jsonl(headers, rows):
+    """Yield JSON Lines text, one object keyed by the header row per log, one chunk per EXPORT_BATCH_SIZE rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(headers, row)), default=str))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
     
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-disposition": f"attachment; filename={log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
-    )
+    if lines:
+        yield '\n'.join(lines) + '\n'
 
 
-def export_logs_excel(logs, log_type):
-    """Export logs as Excel file."""
+def write_excel(headers, rows, output, title):
+    """Write rows into a write-only workbook saved to output, starting a new sheet at Excel's row limit"""
     import openpyxl
-    from io import BytesIO
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"{log_type.capitalize()} Logs"
+    # Write-only mode streams rows to disk instead of keeping a cell object per value
+    wb = openpyxl.Workbook(write_only=True)
+    ws = None
+    sheet_count = 0
+    sheet_rows = 0
+    
+    for row in rows:
+        if ws is None or sheet_rows >= EXCEL_MAX_ROWS:
+            sheet_count += 1
+            ws = wb.create_sheet(title if sheet_count == 1 else f"{title} ({sheet_count})")
+            ws.append(headers)
+            sheet_rows = 1
+        ws.append(row)
+        sheet_rows += 1
+    
+    if ws is None:
+        ws = wb.create_sheet(title)
+        ws.append(headers)
     
-    if log_type == 'student':
-        ws.append(['ID', 'Student Name', 'Email', 'Action', 'Related Type', 'Status', 'Timestamp', 'IP Address'])
-        
-        for log, student, user in logs:
-            ws.append([
-                log.id,
-                f"{user.first_name} {user.last_name}",
-                user.email,
-                log.action,
-                log.related_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-            
-    elif log_type == 'office':
-        ws.append(['ID', 'Admin Name', 'Email', 'Office', 'Login Time', 'Logout Time', 'Duration (sec)', 'Status', 'IP Address'])
-        
-        for log, office_admin, user, office in logs:
-            ws.append([
-                log.id,
-                f"{user.first_name} {user.last_name}",
-                user.email,
-                office.name,
-                log.login_time.strftime('%Y-%m-%d %H:%M:%S'),
-                log.logout_time.strftime('%Y-%m-%d %H:%M:%S') if log.logout_time else '',
-                log.session_duration or '',
-                'Success' if log.is_success else 'Failed',
-                log.ip_address or ''
-            ])
-            
-    elif log_type == 'superadmin':
-        ws.append(['ID', 'Admin Name', 'Email', 'Action', 'Target Type', 'Details', 'Status', 'Timestamp', 'IP Address'])
-        
-        for log, user in logs:
-            ws.append([
-                log.id,
-                f"{user.first_name} {user.last_name}" if user else 'Unknown',
-                user.email if user else '',
-                log.action,
-                log.target_type or '',
-                log.details or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-            
-    else:  # 'all' or any other value
-        ws.append(['ID', 'User', 'Role', 'Action', 'Target Type', 'Status', 'Timestamp', 'IP Address'])
-        
-        for log, user in logs:
-            ws.append([
-                log.id,
-                f"{user.first_name} {user.last_name}" if user else 'Unknown',
-                user.role if user else '',
-                log.action,
-                log.target_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-    
-    output = BytesIO()
     wb.save(output)
-    output.seek(0)
+
+
+# Formats written straight into the response: writer, mimetype, file extension
+STREAMED_EXPORT_FORMATS = {
+    'csv': (write_csv, 'text/csv', 'csv'),
+    'jsonl': (write_jsonl, 'application/x-ndjson', 'jsonl'),
+}
+
+
+def export_logs_streamed(log_type, export_format):
+    """Export logs as a streamed text format (see STREAMED_EXPORT_FORMATS)."""
+    writer, mimetype, extension = STREAMED_EXPORT_FORMATS[export_format]
+    headers, statement, format_row = get_export_query(log_type)
     
     return Response(
-        output.getvalue(),
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-disposition": f"attachment; filename={log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"}
+        stream_with_context(writer(headers, export_rows(statement, format_row))),
+        mimetype=mimetype,
+        headers={"Content-disposition": f"attachment; filename={log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"}
     )
 
 
-def export_logs_pdf(logs, log_type):
-    """Export logs as PDF file."""
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.pagesizes import letter, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet
-    from io import BytesIO
+def export_logs_excel(log_type):
+    """Export logs as Excel file, written row by row from a server-side cursor into a temp file."""
+    import tempfile
     
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-    elements = []
+    headers, statement, format_row = get_export_query(log_type)
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    write_excel(headers, export_rows(statement, format_row), output, f"{log_type.capitalize()} Logs")
+    output.seek(0)
     
-    styles = getSampleStyleSheet()
-    title_style = styles['Heading1']
+    # send_file streams the temp file and closes (and so deletes) it when the response ends
+    return send_file(
+        output,
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        as_attachment=True,
+        download_name=f"{log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    )
+
+
+def export_logs_pdf(log_type):
+    """Start a background PDF export; the file is announced over Socket.IO when it is ready."""
+    job = export_jobs.create_job(
+        current_user.id, 'pdf',
+        f"{log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    )
+    job['download_url'] = url_for('admin.download_export', job_id=job['id'])
+    export_jobs.start_job(current_app._get_current_object(), job, build_logs_pdf, log_type, request.args.to_dict())
     
-    elements.append(Paragraph(f"{log_type.capitalize()} Audit Logs Export", title_style))
-    elements.append(Spacer(1, 12))
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(export_jobs.job_status(job)), 202
     
-    if log_type == 'student':
-        data = [['ID', 'Student Name', 'Email', 'Action', 'Related Type', 'Status', 'Timestamp', 'IP Address']]
-        
-        for log, student, user in logs:
-            data.append([
-                str(log.id),
-                f"{user.first_name} {user.last_name}",
-                user.email,
-                log.action,
-                log.related_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-            
-    elif log_type == 'office':
-        data = [['ID', 'Admin Name', 'Email', 'Office', 'Login Time', 'Logout Time', 'Duration', 'Status', 'IP Address']]
-        
-        for log, office_admin, user, office in logs:
-            data.append([
-                str(log.id),
-                f"{user.first_name} {user.last_name}",
-                user.email,
-                office.name,
-                log.login_time.strftime('%Y-%m-%d %H:%M:%S'),
-                log.logout_time.strftime('%Y-%m-%d %H:%M:%S') if log.logout_time else '',
-                str(log.session_duration) + ' sec' if log.session_duration else '',
-                'Success' if log.is_success else 'Failed',
-                log.ip_address or ''
-            ])
-            
-    elif log_type == 'superadmin':
-        data = [['ID', 'Admin Name', 'Email', 'Action', 'Target Type', 'Status', 'Timestamp', 'IP Address']]
-        
-        for log, user in logs:
-            data.append([
-                str(log.id),
-                f"{user.first_name} {user.last_name}" if user else 'Unknown',
-                user.email if user else '',
-                log.action,
-                log.target_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-            
-    else:  # 'all' or any other value
-        data = [['ID', 'User', 'Role', 'Action', 'Target Type', 'Status', 'Timestamp', 'IP Address']]
-        
-        for log, user in logs:
-            data.append([
-                str(log.id),
-                f"{user.first_name} {user.last_name}" if user else 'Unknown',
-                user.role if user else '',
-                log.action,
-                log.target_type or '',
-                'Success' if log.is_success else 'Failed',
-                log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                log.ip_address or ''
-            ])
-    
-    # Create the table with appropriate styling
-    table = Table(data)
+    flash('PDF export started. It will download automatically when it is ready.', 'info')
+    return redirect(request.referrer or url_for('admin.audit_logs'))
+
+
+def _pdf_table(data):
+    table = Table(data, repeatRows=1)
     table.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -649,14 +986,85 @@ def export_logs_pdf(logs, log_type):
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
         ('GRID', (0, 0), (-1, -1), 1, colors.black)
     ]))
+    return table
+
+
+def build_logs_pdf(job, log_type, args):
+    """
+    Render the PDF for an export job, in fixed-size tables.
+    
+    Table layout cost grows faster than linearly with the row count, so rows are laid
+    out PDF_TABLE_ROWS at a time, yielding to other greenthreads between tables.
+    ReportLab holds the whole document in memory until it is written, so a job renders
+    at most PDF_MAX_ROWS rows and says so at the top when the log has more.
+    Fetching counts for the first half of the progress bar, rendering for the second.
+    """
+    headers, statement, format_row = get_export_query(log_type, args)
+    total = db.session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+    shown = min(total, PDF_MAX_ROWS) or 1
+    
+    # Free-text details do not fit a table cell, so the PDF leaves them out as before
+    kept = [i for i, header in enumerate(headers) if header not in PDF_EXCLUDED_COLUMNS]
+    header_row = [headers[i] for i in kept]
     
-    elements.append(table)
+    doc = SimpleDocTemplate(job['path'], pagesize=landscape(letter))
+    styles = getSampleStyleSheet()
+    elements = [Paragraph(f"{log_type.capitalize()} Audit Logs Export", styles['Heading1'])]
+    if total > PDF_MAX_ROWS:
+        elements.append(Paragraph(
+            f"Showing the first {PDF_MAX_ROWS:,} of {total:,} entries. "
+            f"Use the CSV or JSON Lines export for the full log.",
+            styles['Normal']
+        ))
+    elements.append(Spacer(1, 12))
+    
+    chunk = [header_row]
+    count = 0
+    for count, values in enumerate(export_rows(statement.limit(PDF_MAX_ROWS), format_row), start=1):
+        chunk.append([str(values[i]) for i in kept])
+        if len(chunk) > PDF_TABLE_ROWS:
+            elements.append(_pdf_table(chunk))
+            chunk = [header_row]
+            export_jobs.report_progress(job, 50 * count / shown)
+    
+    if len(chunk) > 1 or count == 0:
+        elements.append(_pdf_table(chunk))
+    
+    rendered = [0]
+    
+    def after_flowable(flowable):
+        if isinstance(flowable, Table):
+            rendered[0] += flowable._nrows - 1
+            export_jobs.report_progress(job, 50 + 50 * rendered[0] / shown)
+            socketio.sleep(0)
+    
+    doc.afterFlowable = after_flowable
     doc.build(elements)
+
+
+@admin_bp.route('/export-jobs/<job_id>', methods=['GET'])
+@login_required
+def export_job_status(job_id):
+    """Progress of a background export started by the current user."""
+    job = export_jobs.get_job(job_id)
+    if not job or job['user_id'] != current_user.id:
+        return jsonify({'error': 'Export not found'}), 404
+    return jsonify(export_jobs.job_status(job))
+
+
+@admin_bp.route('/export-jobs/<job_id>/download', methods=['GET'])
+@login_required
+def download_export(job_id):
+    """Download the file of a finished background export."""
+    job = export_jobs.get_job(job_id)
+    if not job or job['user_id'] != current_user.id:
+        flash('Export not found or expired', 'error')
+        return redirect(url_for('admin.audit_logs'))
     
-    buffer.seek(0)
+    if job['status'] != 'done':
+        flash('Export is not ready yet', 'info')
+        return redirect(url_for('admin.audit_logs'))
     
-    return Response(
-        buffer.getvalue(),
-        mimetype="application/pdf",
-        headers={"Content-disposition": f"attachment; filename={log_type}_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"}
-    )
\ No newline at end of file
+    return send_file(job['path'], mimetype="application/pdf", as_attachment=True, download_name=job['download_name'])
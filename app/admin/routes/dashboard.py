@@ -8,7 +8,9 @@ from flask_login import login_required, current_user
 from datetime import datetime, timedelta
 from sqlalchemy import func, case, or_
 from app.admin import admin_bp
-from app.websockets.admin_sockets import emit_inquiry_update, emit_session_update, emit_system_log, update_dashboard_stats
+from app.services.dashboard_stats import compute_dashboard_stats, compute_inquiry_chart_series
+from app.services.name_cache import get_user_name, get_student_name, get_office_name
+from app.websockets.admin_sockets import emit_inquiry_update, emit_session_update, emit_system_log, mark_dashboard_stats_dirty
 
 @admin_bp.route('/dashboard')
 @login_required
@@ -18,31 +20,26 @@ def dashboard():
         return redirect(url_for('auth.login'))
         
     # Dashboard statistics
-    total_students = User.query.filter_by(role='student').count()
-    total_office_admins = User.query.filter_by(role='office_admin').count()
-    total_inquiries = Inquiry.query.count()
-    pending_inquiries = Inquiry.query.filter_by(status='pending').count()
-    resolved_inquiries = Inquiry.query.filter_by(status='resolved').count()
+    stats = compute_dashboard_stats()
+    total_students = stats['total_students']
+    total_office_admins = stats['total_office_admins']
+    total_inquiries = stats['total_inquiries']
+    pending_inquiries = stats['pending_inquiries']
+    resolved_inquiries = stats['resolved_inquiries']
 
     # Office data
-    office_data = []
-    offices = Office.query.all()
-    for office in offices:
-        inquiry_count = db.session.query(db.func.count(Inquiry.id)).filter(Inquiry.office_id == office.id).scalar()
-        office_data.append({
-            "name": office.name,
-            "count": inquiry_count
-        })
+    office_data = [
+        {"name": office['office_name'], "count": office['inquiries_count']}
+        for office in stats['offices']
+    ]
     
     # Find top office by inquiry count
-    top_office = (
-        db.session.query(Office.name, db.func.count(Inquiry.id).label('inquiry_count'))
-        .join(Inquiry)
-        .group_by(Office.id)
-        .order_by(db.desc('inquiry_count'))
-        .first()
+    top_office = max(
+        (office for office in stats['offices'] if office['inquiries_count'] > 0),
+        key=lambda office: office['inquiries_count'],
+        default=None
     )
-    top_inquiry_office = top_office.name if top_office else "N/A"
+    top_inquiry_office = top_office['office_name'] if top_office else "N/A"
     
     # Recent activities and logs
     recent_activities = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(5).all()
@@ -64,67 +61,15 @@ def dashboard():
         .all()
     )
     
-    # Chart data initialization
+    # Chart data from the daily inquiry rollups
     weekly_labels = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
-    current_week_data = [0, 0, 0, 0, 0, 0, 0]  
-    weekly_new_inquiries = current_week_data.copy()  # Use copy to avoid reference issues
-    weekly_resolved = current_week_data.copy() 
-    
     monthly_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    monthly_new_inquiries = [0] * 12  
-    monthly_resolved = [0] * 12  
-    
-    # Calculate weekly inquiry data
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        day_of_week = day.weekday()
-        
-        # Adjust for Python's weekday (0=Monday) to our display (0=Sunday)
-        chart_index = (day_of_week + 1) % 7
-        
-        new_count = (
-            Inquiry.query
-            .filter(func.date(Inquiry.created_at) == day.date())
-            .count()
-        )
-        
-        # For resolved inquiries, we count those that have status='resolved'
-        # and were updated (not using resolved_at since it doesn't exist)
-        resolved_count = (
-            Inquiry.query
-            .filter(
-                func.date(Inquiry.created_at) == day.date(),
-                Inquiry.status == 'resolved'
-            )
-            .count()
-        )
-        
-        # Update the data arrays
-        weekly_new_inquiries[chart_index] = new_count
-        weekly_resolved[chart_index] = resolved_count
-    
-    # Calculate monthly data
-    current_month = today.month - 1  # 0-based index for months
-    for i in range(12):
-        month_index = (current_month - 11 + i) % 12  # Get the month index, wrapping around
-        year_offset = 0 if month_index <= current_month else -1
-        query_year = today.year + year_offset
-        
-        # Month in database is 1-based
-        db_month = month_index + 1
-        
-        # Count new inquiries for this month
-        monthly_new_inquiries[i] = Inquiry.query.filter(
-            func.extract('year', Inquiry.created_at) == query_year,
-            func.extract('month', Inquiry.created_at) == db_month
-        ).count()
-        
-        # Count resolved inquiries for this month
-        monthly_resolved[i] = Inquiry.query.filter(
-            func.extract('year', Inquiry.created_at) == query_year,
-            func.extract('month', Inquiry.created_at) == db_month,
-            Inquiry.status == 'resolved'
-        ).count()
+
+    chart_series = compute_inquiry_chart_series(today)
+    weekly_new_inquiries = chart_series['weekly_new']
+    weekly_resolved = chart_series['weekly_resolved']
+    monthly_new_inquiries = chart_series['monthly_new']
+    monthly_resolved = chart_series['monthly_resolved']
 
     return render_template(
         'admin/dashboard.html',
@@ -183,7 +128,7 @@ def resolve_inquiry(inquiry_id):
     emit_inquiry_update(inquiry, 'resolved')
     
     # Update dashboard stats for super admins
-    update_dashboard_stats()
+    mark_dashboard_stats_dirty()
     
     return jsonify({'status': 'success', 'message': 'Inquiry resolved successfully'})
 
@@ -226,7 +171,7 @@ def create_session():
         emit_session_update(session, 'new')
         
         # Update dashboard stats for super admins
-        update_dashboard_stats()
+        mark_dashboard_stats_dirty()
         
         return jsonify({'status': 'success', 'message': 'Session created successfully'})
     
@@ -268,7 +213,7 @@ def update_session(session_id):
         emit_session_update(session, 'updated')
         
         # Update dashboard stats for super admins
-        update_dashboard_stats()
+        mark_dashboard_stats_dirty()
         
         return jsonify({'status': 'success', 'message': 'Session updated successfully'})
     
@@ -283,24 +228,18 @@ def get_dashboard_stats():
     if not current_user.role in ['office_admin', 'super_admin']:
         return jsonify({'status': 'error', 'message': 'Unauthorized'}), 403
     
-    total_students = User.query.filter_by(role='student').count()
-    total_office_admins = User.query.filter_by(role='office_admin').count()
-    total_inquiries = Inquiry.query.count()
-    pending_inquiries = Inquiry.query.filter_by(status='pending').count()
-    resolved_inquiries = Inquiry.query.filter_by(status='resolved').count()
+    stats = compute_dashboard_stats()
     
     # Get offices with their inquiry counts
-    offices = Office.query.all()
-    office_data = []
-    for office in offices:
-        inquiry_count = Inquiry.query.filter_by(office_id=office.id).count()
-        session_count = CounselingSession.query.filter_by(office_id=office.id).count()
-        office_data.append({
-            "id": office.id,
-            "name": office.name,
-            "inquiry_count": inquiry_count,
-            "session_count": session_count
-        })
+    office_data = [
+        {
+            "id": office['office_id'],
+            "name": office['office_name'],
+            "inquiry_count": office['inquiries_count'],
+            "session_count": office['sessions_count']
+        }
+        for office in stats['offices']
+    ]
     
     # Get upcoming sessions
     today = datetime.utcnow()
@@ -314,15 +253,11 @@ def get_dashboard_stats():
     
     upcoming_session_data = []
     for session in upcoming_sessions:
-        student = User.query.join(Student).filter(Student.id == session.student_id).first()
-        office = Office.query.get(session.office_id)
-        counselor = User.query.get(session.counselor_id) if session.counselor_id else None
-        
         upcoming_session_data.append({
             "id": session.id,
-            "student_name": student.get_full_name() if student else "Unknown Student",
-            "office_name": office.name if office else "Unknown Office",
-            "counselor_name": counselor.get_full_name() if counselor else "Unassigned",
+            "student_name": get_student_name(session.student_id, "Unknown Student"),
+            "office_name": get_office_name(session.office_id, "Unknown Office"),
+            "counselor_name": get_user_name(session.counselor_id, "Unassigned"),
             "scheduled_at": session.scheduled_at.strftime('%Y-%m-%d %H:%M:%S'),
             "status": session.status
         })
@@ -330,11 +265,11 @@ def get_dashboard_stats():
     return jsonify({
         'status': 'success',
         'data': {
-            'total_students': total_students,
-            'total_office_admins': total_office_admins,
-            'total_inquiries': total_inquiries,
-            'pending_inquiries': pending_inquiries,
-            'resolved_inquiries': resolved_inquiries,
+            'total_students': stats['total_students'],
+            'total_office_admins': stats['total_office_admins'],
+            'total_inquiries': stats['total_inquiries'],
+            'pending_inquiries': stats['pending_inquiries'],
+            'resolved_inquiries': stats['resolved_inquiries'],
             'offices': office_data,
             'upcoming_sessions': upcoming_session_data
         }
@@ -1,6 +1,6 @@
 from app.models import Inquiry, InquiryMessage, User, Office, db, OfficeAdmin, Student, CounselingSession, StudentActivityLog, SuperAdminActivityLog, OfficeLoginLog, AuditLog
 from flask import Blueprint, redirect, url_for, render_template, jsonify, request, flash, Response
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.passwords import hash_password
 from flask_login import login_required, current_user
 from flask_socketio import emit
 from app import socketio
@@ -94,7 +94,7 @@ def view_student(student_id):
  
                 new_password = ''.join(random.choices('0123456789', k=4))
 
-                student.user.password_hash = generate_password_hash(new_password)
+                student.user.password_hash = hash_password(new_password)
                 
                 flash(f'Password has been reset to: {new_password}', 'success')
             
@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, session, request
-from werkzeug.security import check_password_hash, generate_password_hash  
+from app.services.passwords import hash_password, verify_password
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User, Student, AuditLog
 from app.models import User, Student  
@@ -21,24 +21,22 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        if user and verify_password(user.password_hash, password):
             # Successful login
             login_user(user)
             flash('Login successful!', 'success')
 
-            # Log successful login
-            log = AuditLog(
-                actor_id=user.id,  # Changed from user_id to actor_id
-                actor_role=user.role,  # Added actor_role
+            # Log successful login (written in the background by the audit sink)
+            AuditLog.log_action(
+                actor=user,
                 action='Logged in',
                 target_type='authentication',
-                status_snapshot='success',
+                status='success',
                 is_success=True,
                 ip_address=request.remote_addr,
-                user_agent=request.user_agent.string if request.user_agent else None
+                user_agent=request.user_agent.string if request.user_agent else None,
+                buffered=True
             )
-            db.session.add(log)
-            db.session.commit()
             
             # Redirect based on role
             if user.role == 'super_admin':
@@ -52,19 +50,17 @@ def login():
                 return redirect(url_for('auth.login'))
         else:
             # Failed login attempt
-            log = AuditLog(
-                actor_id=user.id if user else None,  # Changed from user_id to actor_id
-                actor_role=user.role if user else None,  # Added actor_role
+            AuditLog.log_action(
+                actor=user,
                 action='Failed login attempt',
                 target_type='authentication',
-                status_snapshot='failed',
+                status='failed',
                 is_success=False,
                 ip_address=request.remote_addr,
                 user_agent=request.user_agent.string if request.user_agent else None,
-                failure_reason='Invalid credentials'  # Added failure reason
+                failure_reason='Invalid credentials',
+                buffered=True
             )
-            db.session.add(log)
-            db.session.commit()
             
             flash('Invalid email or password', 'danger')
             return render_template('auth/login.html')
@@ -103,7 +99,7 @@ def register():
             last_name=last_name,
             email=email,
             role='student',  
-            password_hash=generate_password_hash(password, method='pbkdf2:sha256'),
+            password_hash=hash_password(password),
             is_active=True
         )
         
@@ -130,18 +126,16 @@ def register():
 @login_required 
 def logout():
     
-    log = AuditLog(
-        actor_id=current_user.id,
-        actor_role=current_user.role,
+    AuditLog.log_action(
+        actor=current_user,
         action='Logged out',
         target_type='authentication',
-        status_snapshot='success',
+        status='success',
         is_success=True,
         ip_address=request.remote_addr,
-        user_agent=request.user_agent.string if request.user_agent else None
+        user_agent=request.user_agent.string if request.user_agent else None,
+        buffered=True
     )
-    db.session.add(log)
-    db.session.commit()
     
     logout_user()
     flash('You have been logged out.', 'success')
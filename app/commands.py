@@ -0,0 +1,172 @@
+import click
+from flask.cli import AppGroup
+
+stats_cli = AppGroup('stats', help='Dashboard statistics maintenance.')
+
+
+@stats_cli.command('create-tables')
+def create_stats_tables_command():
+    """Create stats_counters and inquiry_daily_rollups on an existing database, then fill them"""
+    from app.extensions import db
+    from app.models import StatsCounter, InquiryDailyRollup
+    from app.services.stats_counters import reconcile_counters, rebuild_inquiry_rollups
+
+    for model in (StatsCounter, InquiryDailyRollup):
+        model.__table__.create(db.engine, checkfirst=True)
+    click.echo('Statistics tables are in place.')
+
+    # Both steps rebuild from the source tables, so running this again is harmless
+    drift = reconcile_counters(fix=True)
+    click.echo(f"Rebuilt counters, fixed {len(drift)} drifted value(s).")
+    rows = rebuild_inquiry_rollups()
+    click.echo(f"Wrote {rows} daily rollup row(s).")
+
+
+@stats_cli.command('reconcile')
+@click.option('--check', is_flag=True, help='Only report drift, do not rewrite the counters.')
+def reconcile_stats_command(check):
+    """Rebuild stats_counters from the inquiries and counseling_sessions tables"""
+    from app.services.stats_counters import reconcile_counters
+
+    drift = reconcile_counters(fix=not check)
+    if not drift:
+        click.echo('Counters are in sync.')
+        return
+
+    for office_id, subject, status, stored, actual in drift:
+        click.echo(f"office={office_id} {subject}/{status}: stored={stored} actual={actual}")
+
+    if check:
+        click.echo(f"{len(drift)} counter(s) drifted. Run without --check to rebuild.")
+    else:
+        click.echo(f"Rebuilt counters, fixed {len(drift)} drifted value(s).")
+
+
+@stats_cli.command('backfill-rollups')
+def backfill_rollups_command():
+    """Rebuild inquiry_daily_rollups from the full inquiry history"""
+    from app.services.stats_counters import rebuild_inquiry_rollups
+
+    rows = rebuild_inquiry_rollups()
+    click.echo(f"Wrote {rows} daily rollup row(s).")
+
+
+database_cli = AppGroup('database', help='Database driver and connection checks.')
+
+
+@database_cli.command('green-check')
+@click.option('--seconds', default=2.0, show_default=True, help='Length of the pg_sleep query.')
+def green_check_command(seconds):
+    """Verify other greenthreads keep running while a pg_sleep query is in flight"""
+    import eventlet
+    from app.extensions import db
+    from app.services.green_db import make_psycopg_green, is_green
+
+    if not is_green():
+        make_psycopg_green()
+
+    # Fresh connections so the pool hands out sockets opened under the callback
+    db.engine.dispose()
+    tick_interval = 0.05
+    ticks = []
+
+    def ticker():
+        while True:
+            eventlet.sleep(tick_interval)
+            ticks.append(1)
+
+    def slow_query():
+        with db.engine.connect() as connection:
+            connection.execute(db.text('SELECT pg_sleep(:seconds)'), {'seconds': seconds})
+
+    ticker_thread = eventlet.spawn(ticker)
+    eventlet.spawn(slow_query).wait()
+    ticker_thread.kill()
+
+    expected = int(seconds / tick_interval)
+    click.echo(f"Ticker ran {len(ticks)} time(s) during a {seconds}s pg_sleep (expected ~{expected}).")
+    if len(ticks) < expected // 2:
+        raise click.ClickException('The query blocked the eventlet hub; psycopg2 is not cooperative.')
+    click.echo('psycopg2 is cooperative.')
+
+
+@database_cli.command('create-indexes')
+def create_indexes_command():
+    """Create the model indexes and, on PostgreSQL, the pg_trgm search indexes on an existing database"""
+    from app.extensions import db
+    from app.services.search import create_trigram_indexes
+
+    # Indexes declared on the models (e.g. the (timestamp, id) keyset indexes) that an
+    # older database was created without
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    click.echo('Model indexes are in place.')
+
+    if db.engine.dialect.name != 'postgresql':
+        click.echo('Not PostgreSQL: skipping trigram search indexes, search falls back to plain ILIKE.')
+        return
+
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        names = create_trigram_indexes(connection)
+    click.echo(f"Trigram search indexes are in place ({len(names)}).")
+
+
+logs_cli = AppGroup('logs', help='Audit and activity log maintenance.')
+
+
+@logs_cli.command('purge')
+@click.option('--batch-size', type=int, default=None, help='Rows deleted per transaction (default: LOG_RETENTION_BATCH_SIZE).')
+@click.option('--pause-ms', type=int, default=None, help='Pause between batches (default: LOG_RETENTION_BATCH_PAUSE_MS).')
+def purge_logs_command(batch_size, pause_ms):
+    """Delete log rows older than their retention_days"""
+    from app.services.retention import purge_expired_logs
+
+    report = purge_expired_logs(batch_size=batch_size, pause=pause_ms / 1000.0 if pause_ms is not None else None)
+    if report is None:
+        click.echo("Another purge is already running; nothing done.")
+        return
+    for table, purged in report.items():
+        click.echo(f"{table}: purged {purged} row(s)")
+    click.echo(f"Total: {sum(report.values())} row(s).")
+
+
+@logs_cli.command('partition')
+@click.option('--table', 'tables', multiple=True, help='Only convert this log table (repeatable).')
+@click.option('--months-ahead', default=3, show_default=True, help='Future monthly partitions to create.')
+def partition_logs_command(tables, months_ahead):
+    """Convert the log tables to monthly range partitions (PostgreSQL, takes an exclusive lock)"""
+    from app.extensions import db
+    from app.services.retention import LOG_TABLES
+    from app.services.partitions import is_partitioned, convert_to_partitioned
+
+    if db.engine.dialect.name != 'postgresql':
+        raise click.ClickException('Partitioning needs PostgreSQL.')
+
+    for model, timestamp_column in LOG_TABLES:
+        table = model.__tablename__
+        if tables and table not in tables:
+            continue
+        with db.engine.begin() as connection:
+            if is_partitioned(connection, table):
+                click.echo(f"{table}: already partitioned")
+                continue
+            copied = convert_to_partitioned(connection, model, timestamp_column, months_ahead)
+        click.echo(f"{table}: partitioned by month, {copied} row(s) copied")
+
+
+@logs_cli.command('ensure-partitions')
+@click.option('--months-ahead', default=3, show_default=True, help='Future monthly partitions to keep ready.')
+def ensure_partitions_command(months_ahead):
+    """Create the upcoming monthly partitions of the partitioned log tables"""
+    from app.services.partitions import ensure_all_partitions
+
+    created = ensure_all_partitions(months_ahead)
+    click.echo(f"Created {len(created)} partition(s)." + (f" {', '.join(created)}" if created else ''))
+
+
+def register_commands(app):
+    """Attach the maintenance CLI groups to the app"""
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(database_cli)
+    app.cli.add_command(logs_cli)
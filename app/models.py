@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.services.audit_sink import audit_sink
 from datetime import datetime
 from flask_login import UserMixin
 
@@ -163,14 +164,18 @@ class AuditLog(db.Model, JsonSerializableMixin):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     retention_days = db.Column(db.Integer, default=365)  # Keep logs for 1 year by default
 
+    # Keyset pagination of the audit log views walks this index (app/services/keyset.py)
+    __table_args__ = (db.Index('ix_audit_logs_timestamp_id', 'timestamp', 'id'),)
+
     actor = db.relationship('User')
     inquiry = db.relationship('Inquiry')
     office = db.relationship('Office')
 
     @classmethod
     def log_action(cls, actor, action, target_type=None, inquiry=None, office=None, status=None, is_success=True, 
-                  failure_reason=None, ip_address=None, user_agent=None, retention_days=365):
-        """Helper method to create a new audit log entry"""
+                  failure_reason=None, ip_address=None, user_agent=None, retention_days=365, buffered=False):
+        """Helper method to create a new audit log entry.
+        With buffered=True the entry is written later by the audit sink instead of the current session."""
         log = cls(
             actor_id=actor.id if actor else None,
             actor_role=actor.role if actor else None,
@@ -185,7 +190,10 @@ class AuditLog(db.Model, JsonSerializableMixin):
             user_agent=user_agent,
             retention_days=retention_days
         )
-        db.session.add(log)
+        if buffered:
+            audit_sink.enqueue(log)
+        else:
+            db.session.add(log)
         return log
 
 
@@ -204,12 +212,15 @@ class StudentActivityLog(db.Model, JsonSerializableMixin):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     retention_days = db.Column(db.Integer, default=365)  # Keep logs for 1 year by default
 
+    __table_args__ = (db.Index('ix_student_activity_logs_timestamp_id', 'timestamp', 'id'),)
+
     student = db.relationship('Student')
 
     @classmethod
     def log_action(cls, student, action, related_id=None, related_type=None, is_success=True, 
-                  failure_reason=None, ip_address=None, user_agent=None, retention_days=365):
-        """Helper method to create a new student activity log entry"""
+                  failure_reason=None, ip_address=None, user_agent=None, retention_days=365, buffered=False):
+        """Helper method to create a new student activity log entry.
+        With buffered=True the entry is written later by the audit sink instead of the current session."""
         log = cls(
             student_id=student.id,
             action=action,
@@ -221,7 +232,10 @@ class StudentActivityLog(db.Model, JsonSerializableMixin):
             user_agent=user_agent,
             retention_days=retention_days
         )
-        db.session.add(log)
+        if buffered:
+            audit_sink.enqueue(log)
+        else:
+            db.session.add(log)
         return log
 
 # Office login logs to track the time when office admins log in
@@ -238,12 +252,15 @@ class OfficeLoginLog(db.Model, JsonSerializableMixin):
     failure_reason = db.Column(db.String(255))
     retention_days = db.Column(db.Integer, default=365)  # Keep logs for 1 year by default
 
+    __table_args__ = (db.Index('ix_office_login_logs_login_time_id', 'login_time', 'id'),)
+
     office_admin = db.relationship('OfficeAdmin')
 
     @classmethod
     def log_login(cls, office_admin, ip_address=None, user_agent=None, is_success=True,
-                failure_reason=None, retention_days=365):
-        """Helper method to create a new office login log entry"""
+                failure_reason=None, retention_days=365, buffered=False):
+        """Helper method to create a new office login log entry.
+        With buffered=True the entry is written later by the audit sink instead of the current session."""
         log = cls(
             office_admin_id=office_admin.id,
             ip_address=ip_address,
@@ -252,7 +269,10 @@ class OfficeLoginLog(db.Model, JsonSerializableMixin):
             failure_reason=failure_reason,
             retention_days=retention_days
         )
-        db.session.add(log)
+        if buffered:
+            audit_sink.enqueue(log)
+        else:
+            db.session.add(log)
         return log
 
     def update_logout(self, logout_time=None):
@@ -280,6 +300,8 @@ class SuperAdminActivityLog(db.Model, JsonSerializableMixin):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     retention_days = db.Column(db.Integer, default=730)  # Super admin logs kept longer by default (2 years)
 
+    __table_args__ = (db.Index('ix_super_admin_activity_logs_timestamp_id', 'timestamp', 'id'),)
+
     super_admin = db.relationship('User', foreign_keys=[super_admin_id])
     target_user = db.relationship('User', foreign_keys=[target_user_id])
     target_office = db.relationship('Office')
@@ -287,8 +309,9 @@ class SuperAdminActivityLog(db.Model, JsonSerializableMixin):
     @classmethod
     def log_action(cls, super_admin, action, target_type=None, target_user=None, target_office=None, 
                   details=None, is_success=True, failure_reason=None, ip_address=None, 
-                  user_agent=None, retention_days=730):
-        """Helper method to create a new super admin activity log entry"""
+                  user_agent=None, retention_days=730, buffered=False):
+        """Helper method to create a new super admin activity log entry.
+        With buffered=True the entry is written later by the audit sink instead of the current session."""
         log = cls(
             super_admin_id=super_admin.id,
             action=action,
@@ -302,5 +325,28 @@ class SuperAdminActivityLog(db.Model, JsonSerializableMixin):
             user_agent=user_agent,
             retention_days=retention_days
         )
-        db.session.add(log)
-        return log
\ No newline at end of file
+        if buffered:
+            audit_sink.enqueue(log)
+        else:
+            db.session.add(log)
+        return log
+
+
+# Running counts of inquiries and counseling sessions per office and status.
+# Maintained in the same transaction as the status change (see app/services/stats_counters.py)
+class StatsCounter(db.Model):
+    __tablename__ = 'stats_counters'
+    office_id = db.Column(db.Integer, db.ForeignKey('offices.id', ondelete='CASCADE'), primary_key=True)
+    subject = db.Column(db.String(20), primary_key=True)  # 'inquiry', 'session'
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Per-day, per-office inquiry counts backing the weekly and monthly dashboard charts.
+# resolved_count counts inquiries created on that day that are currently resolved.
+class InquiryDailyRollup(db.Model):
+    __tablename__ = 'inquiry_daily_rollups'
+    day = db.Column(db.Date, primary_key=True)
+    office_id = db.Column(db.Integer, db.ForeignKey('offices.id', ondelete='CASCADE'), primary_key=True, index=True)
+    new_count = db.Column(db.Integer, nullable=False, default=0)
+    resolved_count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,155 @@
+from app.extensions import db, socketio
+from collections import defaultdict, deque
+from flask import current_app
+import atexit
+import threading
+import time
+
+
+class AuditSink:
+    """
+    Write-behind buffer for audit and activity log rows.
+
+    Log records are queued in memory and written by a background task in
+    multi-row ``INSERT ... VALUES`` batches, every ``AUDIT_SINK_BATCH_SIZE``
+    records or ``AUDIT_SINK_FLUSH_MS`` milliseconds, whichever comes first,
+    on their own session and commit. The queue is drained at interpreter exit.
+
+    A batch that fails to insert goes back to the front of the queue and is
+    retried on the next flush. After ``AUDIT_SINK_MAX_ATTEMPTS`` failures its
+    records are inserted one at a time, so a single bad record cannot hold
+    back the rest; only the records that still fail are logged and dropped.
+
+    Buffered rows are not part of the caller's transaction, so use this only
+    for logs that need not roll back with a change (logins, socket connects,
+    page views). Set ``AUDIT_SINK_ENABLED = False`` to write them inline.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.batch_size = 100
+        self.flush_interval = 0.5
+        self.max_attempts = 3
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('AUDIT_SINK_ENABLED', True)
+        self.batch_size = app.config.get('AUDIT_SINK_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('AUDIT_SINK_FLUSH_MS', self.flush_interval * 1000) / 1000.0
+        self.max_attempts = app.config.get('AUDIT_SINK_MAX_ATTEMPTS', self.max_attempts)
+        atexit.register(self.drain)
+
+    @staticmethod
+    def _row(log):
+        """Column values of a transient log object, with column defaults resolved now"""
+        row = {}
+        for column in log.__table__.columns:
+            if column.primary_key:
+                continue
+            value = getattr(log, column.key)
+            if value is None and column.default is not None:
+                if column.default.is_scalar:
+                    value = column.default.arg
+                elif column.default.is_callable:
+                    value = column.default.arg(None)
+            row[column.key] = value
+        return row
+
+    def enqueue(self, log):
+        """
+        Queue a transient log object for a later batched insert.
+
+        :param log: an unsaved AuditLog / StudentActivityLog / OfficeLoginLog / SuperAdminActivityLog
+        """
+        if not self.enabled or self.app is None:
+            db.session.add(log)
+            return
+
+        with self._lock:
+            # (table, column values, failed attempts so far)
+            self._queue.append((log.__table__, self._row(log), 0))
+            full = len(self._queue) >= self.batch_size
+            start = not self._running
+            self._running = True
+
+        if start:
+            socketio.start_background_task(self._run)
+        if full:
+            socketio.start_background_task(self.flush)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.flush_interval)
+            self.flush()
+            with self._lock:
+                if not self._queue:
+                    self._running = False
+                    return
+
+    def flush(self):
+        """
+        Write every queued record in bulk inserts on a separate session.
+
+        :return: number of records written
+        """
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+        if not batch:
+            return 0
+
+        with self.app.app_context():
+            try:
+                self._insert(batch)
+                return len(batch)
+            except Exception as e:
+                db.session.rollback()
+                retry = [(table, row, attempts + 1) for table, row, attempts in batch if attempts + 1 < self.max_attempts]
+                exhausted = [entry for entry in batch if entry[2] + 1 >= self.max_attempts]
+                current_app.logger.warning(
+                    "Error flushing %d audit log record(s), %d requeued: %s", len(batch), len(retry), e
+                )
+                with self._lock:
+                    self._queue.extendleft(reversed(retry))
+                return self._insert_one_by_one(exhausted)
+            finally:
+                db.session.remove()
+
+    def _insert(self, batch):
+        rows_by_table = defaultdict(list)
+        for table, row, _ in batch:
+            rows_by_table[table].append(row)
+
+        for table, rows in rows_by_table.items():
+            for start in range(0, len(rows), self.batch_size):
+                db.session.execute(table.insert().values(rows[start:start + self.batch_size]))
+        db.session.commit()
+
+    def _insert_one_by_one(self, batch):
+        """Last attempt for records whose batch kept failing: each in its own transaction"""
+        written = 0
+        for table, row, _ in batch:
+            try:
+                db.session.execute(table.insert().values(row))
+                db.session.commit()
+                written += 1
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception("Dropping audit log record for %s: %r", table.name, row)
+        return written
+
+    def drain(self):
+        """Flush until the queue is empty; registered to run at shutdown"""
+        if self.app is None:
+            return
+        # Terminates: every failed flush uses up an attempt of the records it requeues
+        while self._queue:
+            if not self.flush():
+                time.sleep(self.flush_interval)
+
+
+audit_sink = AuditSink()
@@ -0,0 +1,54 @@
+from app.extensions import db, socketio
+import threading
+
+
+class DebouncedBroadcaster:
+    """
+    Coalesce "dirty" signals and run one publish per window in a background task.
+
+    Request handlers call mark_dirty(), which only sets a flag. The first
+    signal of a window starts a greenthread (via socketio.start_background_task)
+    that sleeps for the window, then runs the publish callback once inside an
+    app context. Signals that arrive while publishing schedule one more run.
+    """
+
+    def __init__(self, publish, window_config_key, default_window_ms=250):
+        self.publish = publish
+        self.window_config_key = window_config_key
+        self.window = default_window_ms / 1000.0
+        self.app = None
+        self._dirty = False
+        self._running = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        window_ms = app.config.get(self.window_config_key)
+        if window_ms is not None:
+            self.window = window_ms / 1000.0
+
+    def mark_dirty(self):
+        """Flag the data as stale; the background task picks it up at the end of the window"""
+        with self._lock:
+            self._dirty = True
+            if self._running:
+                return
+            self._running = True
+        socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.window)
+            with self._lock:
+                if not self._dirty:
+                    self._running = False
+                    return
+                self._dirty = False
+
+            with self.app.app_context():
+                try:
+                    self.publish()
+                except Exception as e:
+                    print(f"Error publishing {self.window_config_key} broadcast: {str(e)}")
+                finally:
+                    db.session.remove()
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Small process-local LRU cache whose entries expire after ``ttl`` seconds.
+
+    Safe to share between greenthreads and threads. ``maxsize=None`` means unbounded.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        """Return the cached value for key, computing and storing it with factory() on a miss"""
+        value = self.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
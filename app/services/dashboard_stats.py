@@ -0,0 +1,187 @@
+from app.models import User, CounselingSession, Office, InquiryDailyRollup
+from app.extensions import db
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.services.stats_counters import read_counters
+
+
+def _counter_total(office_counters, subject):
+    """Sum every status counter of one subject for an office"""
+    return sum(count for (counter_subject, _), count in office_counters.items() if counter_subject == subject)
+
+
+def compute_dashboard_stats():
+    """
+    Compute every dashboard statistic with a fixed number of aggregate queries.
+
+    Inquiry and session counts are read from the stats_counters table, so
+    the cost no longer grows with the number of offices or rows.
+
+    :return: dict with global totals and an ``offices`` list
+    """
+    now = datetime.utcnow()
+
+    user_totals = db.session.query(
+        func.count(User.id).filter(User.is_active == True).label('active_users'),
+        func.count(User.id).filter(User.role == 'student').label('total_students'),
+        func.count(User.id).filter(User.role == 'office_admin').label('total_office_admins')
+    ).one()
+
+    # Inquiry and session counts come from the maintained counters table;
+    # only "upcoming" depends on the clock and needs a live query.
+    counters = read_counters()
+
+    upcoming_rows = db.session.query(
+        CounselingSession.office_id,
+        func.count(CounselingSession.id).label('upcoming')
+    ).filter(
+        CounselingSession.scheduled_at > now,
+        CounselingSession.status == 'scheduled'
+    ).group_by(CounselingSession.office_id).all()
+    upcoming_by_office = {row.office_id: row.upcoming for row in upcoming_rows}
+
+    offices = db.session.query(Office.id, Office.name).order_by(Office.id).all()
+
+    office_stats = []
+    for office in offices:
+        office_counters = counters.get(office.id, {})
+        office_stats.append({
+            'office_id': office.id,
+            'office_name': office.name,
+            'inquiries_count': _counter_total(office_counters, 'inquiry'),
+            'pending_inquiries': office_counters.get(('inquiry', 'pending'), 0),
+            'resolved_inquiries': office_counters.get(('inquiry', 'resolved'), 0),
+            'sessions_count': _counter_total(office_counters, 'session'),
+            'upcoming_sessions': upcoming_by_office.get(office.id, 0)
+        })
+
+    return {
+        'active_users': user_totals.active_users,
+        'total_students': user_totals.total_students,
+        'total_office_admins': user_totals.total_office_admins,
+        'total_inquiries': sum(office['inquiries_count'] for office in office_stats),
+        'pending_inquiries': sum(office['pending_inquiries'] for office in office_stats),
+        'resolved_inquiries': sum(office['resolved_inquiries'] for office in office_stats),
+        'upcoming_sessions': sum(office['upcoming_sessions'] for office in office_stats),
+        'offices': office_stats
+    }
+
+
+def realtime_stats_payload(stats=None):
+    """
+    Shape dashboard statistics for the real-time super admin dashboard.
+
+    :param stats: result of compute_dashboard_stats(), computed if omitted
+    """
+    if stats is None:
+        stats = compute_dashboard_stats()
+
+    return {
+        'active_users': stats['active_users'],
+        'pending_inquiries': stats['pending_inquiries'],
+        'upcoming_sessions': stats['upcoming_sessions'],
+        'office_activity': [
+            {
+                'office_id': office['office_id'],
+                'office_name': office['office_name'],
+                'inquiries_count': office['inquiries_count'],
+                'sessions_count': office['sessions_count']
+            }
+            for office in stats['offices']
+        ],
+        'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def office_stats_payload(office):
+    """
+    Shape one office's statistics for the admins of that office.
+
+    :param office: an entry of compute_dashboard_stats()['offices']
+    """
+    payload = dict(office)
+    payload['timestamp'] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    return payload
+
+
+def compute_admin_management_stats():
+    """Counts shown on the admin management page, fetched in one round trip"""
+    total_offices = db.session.query(func.count(Office.id)).scalar_subquery()
+    active_office_admins = db.session.query(func.count(User.id)).filter(
+        User.role == 'office_admin', User.is_active == True
+    ).scalar_subquery()
+    unassigned_offices = db.session.query(func.count(Office.id)).filter(
+        ~Office.office_admins.any()
+    ).scalar_subquery()
+    unassigned_admins = db.session.query(func.count(User.id)).filter(
+        User.role == 'office_admin', ~User.office_admin.has()
+    ).scalar_subquery()
+
+    row = db.session.query(
+        total_offices.label('total_offices'),
+        active_office_admins.label('active_office_admins'),
+        unassigned_offices.label('unassigned_offices'),
+        unassigned_admins.label('unassigned_admins')
+    ).one()
+
+    return {
+        'total_offices': row.total_offices,
+        'active_office_admins': row.active_office_admins,
+        'unassigned_offices': row.unassigned_offices,
+        'unassigned_admins': row.unassigned_admins
+    }
+
+
+
+def _rollup_totals_since(start_day):
+    """Sum the inquiry rollups across offices per day, from start_day onwards, in one range scan"""
+    rows = db.session.query(
+        InquiryDailyRollup.day,
+        func.sum(InquiryDailyRollup.new_count).label('new_count'),
+        func.sum(InquiryDailyRollup.resolved_count).label('resolved_count')
+    ).filter(
+        InquiryDailyRollup.day >= start_day
+    ).group_by(InquiryDailyRollup.day).all()
+    return {row.day: (int(row.new_count or 0), int(row.resolved_count or 0)) for row in rows}
+
+
+def compute_inquiry_chart_series(today=None):
+    """
+    Build the weekly and monthly inquiry chart series from inquiry_daily_rollups.
+
+    Weekly values are indexed Sunday-first; monthly values run from eleven
+    months ago up to the current month.
+
+    :return: dict with weekly_new, weekly_resolved, monthly_new, monthly_resolved lists
+    """
+    today = today or datetime.utcnow()
+
+    weekly_new = [0] * 7
+    weekly_resolved = [0] * 7
+    week_start = (today - timedelta(days=6)).date()
+    for day, (new_count, resolved_count) in _rollup_totals_since(week_start).items():
+        # Adjust for Python's weekday (0=Monday) to our display (0=Sunday)
+        chart_index = (day.weekday() + 1) % 7
+        weekly_new[chart_index] = new_count
+        weekly_resolved[chart_index] = resolved_count
+
+    current_month = today.month - 1  # 0-based index for months
+    months = []
+    for i in range(12):
+        month_index = (current_month - 11 + i) % 12
+        year_offset = 0 if month_index <= current_month else -1
+        months.append((today.year + year_offset, month_index + 1))
+
+    monthly_totals = {}
+    year, month = months[0]
+    for day, (new_count, resolved_count) in _rollup_totals_since(datetime(year, month, 1).date()).items():
+        totals = monthly_totals.setdefault((day.year, day.month), [0, 0])
+        totals[0] += new_count
+        totals[1] += resolved_count
+
+    return {
+        'weekly_new': weekly_new,
+        'weekly_resolved': weekly_resolved,
+        'monthly_new': [monthly_totals.get(key, [0, 0])[0] for key in months],
+        'monthly_resolved': [monthly_totals.get(key, [0, 0])[1] for key in months]
+    }
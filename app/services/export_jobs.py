@@ -0,0 +1,116 @@
+"""
+Background export jobs.
+
+A job runs as a Socket.IO background task, writes its file under EXPORT_JOB_DIR
+and reports progress to the requesting user's ``user_<id>`` room. Job state is
+kept in process memory, which matches the single eventlet server process;
+finished files are removed after EXPORT_JOB_TTL seconds.
+"""
+from app.extensions import db, socketio
+from datetime import datetime, timedelta
+from uuid import uuid4
+import os
+import threading
+
+_jobs = {}
+_lock = threading.Lock()
+_settings = {'dir': None, 'ttl': 3600}
+
+
+def init_app(app):
+    _settings['dir'] = app.config.get('EXPORT_JOB_DIR') or os.path.join(app.instance_path, 'exports')
+    _settings['ttl'] = app.config.get('EXPORT_JOB_TTL', 3600)
+    os.makedirs(_settings['dir'], exist_ok=True)
+
+
+def create_job(user_id, extension, download_name):
+    """
+    Register a new pending job.
+
+    :param user_id: The user who asked for the export and may download it
+    :param extension: File extension of the output, e.g. 'pdf'
+    :param download_name: File name offered to the browser
+    :return: The job dict
+    """
+    purge_expired_jobs()
+    job_id = uuid4().hex
+    job = {
+        'id': job_id,
+        'user_id': user_id,
+        'status': 'pending',
+        'progress': 0,
+        'error': None,
+        'path': os.path.join(_settings['dir'], f"{job_id}.{extension}"),
+        'download_name': download_name,
+        'download_url': None,
+        'created_at': datetime.utcnow()
+    }
+    with _lock:
+        _jobs[job_id] = job
+    return job
+
+
+def get_job(job_id):
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def job_status(job):
+    """Public view of a job, safe to send to the browser"""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'download_url': job['download_url'] if job['status'] == 'done' else None
+    }
+
+
+def _emit(event, job):
+    socketio.emit(event, job_status(job), room=f"user_{job['user_id']}")
+
+
+def report_progress(job, progress):
+    """Record progress (0-100) and tell the user, only when the whole percentage changes"""
+    progress = min(int(progress), 99)
+    if progress == job['progress']:
+        return
+    job['progress'] = progress
+    _emit('export_progress', job)
+
+
+def start_job(app, job, func, *args):
+    """Run func(job, *args) as a background task inside an app context"""
+    socketio.start_background_task(_run, app, job, func, args)
+
+
+def _run(app, job, func, args):
+    with app.app_context():
+        try:
+            job['status'] = 'running'
+            func(job, *args)
+            job['status'] = 'done'
+            job['progress'] = 100
+            _emit('export_ready', job)
+        except Exception as e:
+            db.session.rollback()
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            print(f"Error running export job {job['id']}: {str(e)}")
+            _emit('export_failed', job)
+        finally:
+            db.session.remove()
+
+
+def purge_expired_jobs():
+    """Forget jobs older than EXPORT_JOB_TTL and delete their files"""
+    cutoff = datetime.utcnow() - timedelta(seconds=_settings['ttl'])
+    with _lock:
+        expired = [job for job in _jobs.values() if job['created_at'] < cutoff and job['status'] != 'running']
+        for job in expired:
+            del _jobs[job['id']]
+    for job in expired:
+        try:
+            os.remove(job['path'])
+        except OSError:
+            pass
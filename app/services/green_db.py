@@ -0,0 +1,67 @@
+"""
+Cooperative psycopg2 under eventlet.
+
+psycopg2 is a C extension, so monkey_patch() cannot make its socket I/O yield
+to the hub. Installing a wait callback puts every connection in async mode and
+lets us wait on the connection's file descriptor with eventlet's trampoline,
+so a slow query only parks its own greenthread.
+"""
+import psycopg2
+from psycopg2 import extensions
+
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """A wait callback useful to allow eventlet to work with psycopg2"""
+    from eventlet.hubs import trampoline
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def make_psycopg_green():
+    """Route all psycopg2 blocking waits through the eventlet hub"""
+    if not hasattr(extensions, 'set_wait_callback'):
+        raise ImportError("support for coroutines not available in this psycopg2 version")
+    extensions.set_wait_callback(eventlet_wait_callback)
+
+
+def is_green():
+    return extensions.get_wait_callback() is eventlet_wait_callback
+
+
+def running_under_eventlet():
+    """True when run.py has already monkey-patched the standard library"""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('socket')
+
+
+def init_app(app):
+    """
+    Make psycopg2 cooperative when serving under eventlet and size the pool.
+
+    Must run before db.init_app(), which reads SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        return
+
+    # Every greenthread blocked on a query now holds a pooled connection, so the
+    # pool rather than the hub becomes the limit on concurrent requests.
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    engine_options.setdefault('pool_size', app.config.get('DB_POOL_SIZE', 20))
+    engine_options.setdefault('max_overflow', app.config.get('DB_MAX_OVERFLOW', 10))
+    engine_options.setdefault('pool_timeout', app.config.get('DB_POOL_TIMEOUT', 10))
+    engine_options.setdefault('pool_pre_ping', True)
+
+    if app.config.get('GREEN_DB_ENABLED', True) and running_under_eventlet():
+        make_psycopg_green()
@@ -0,0 +1,107 @@
+from app.models import Inquiry
+from app.extensions import db
+from app.services.cache import TTLCache
+from app.services.stats_counters import read_counters
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect
+
+STATUSES = ('pending', 'in_progress', 'resolved')
+
+# Single-entry cache; cleared whenever a commit creates, deletes or re-statuses an inquiry
+_stats_cache = TTLCache(ttl=30)
+
+
+def init_app(app):
+    """Configure the cache TTL and register the invalidation listeners"""
+    _stats_cache.ttl = app.config.get('INQUIRY_STATS_CACHE_TTL', _stats_cache.ttl)
+
+    if not event.contains(db.session, 'after_flush', _note_inquiry_changes):
+        event.listen(db.session, 'after_flush', _note_inquiry_changes)
+        event.listen(db.session, 'after_commit', _invalidate_after_commit)
+        event.listen(db.session, 'after_soft_rollback', _forget_changes)
+
+
+def _note_inquiry_changes(session, flush_context):
+    """Remember that this transaction touched inquiry counts"""
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Inquiry):
+            session.info['inquiry_stats_dirty'] = True
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Inquiry) and inspect(obj).attrs.status.history.has_changes():
+            session.info['inquiry_stats_dirty'] = True
+            return
+
+
+def _invalidate_after_commit(session):
+    if session.info.pop('inquiry_stats_dirty', False):
+        invalidate_inquiry_stats()
+
+
+def _forget_changes(session, previous_transaction):
+    session.info.pop('inquiry_stats_dirty', None)
+
+
+def invalidate_inquiry_stats():
+    """Drop the cached inquiry statistics"""
+    _stats_cache.clear()
+
+
+def _percent_change(this_week, last_week):
+    if last_week > 0:
+        return ((this_week - last_week) / last_week) * 100
+    return 100 if this_week > 0 else 0
+
+
+def compute_inquiry_stats():
+    """
+    Calculate inquiry statistics for the inquiries page.
+
+    Status totals come from stats_counters; the week-over-week figures come
+    from one conditional-aggregation query over the last two weeks.
+    """
+    totals = dict.fromkeys(STATUSES, 0)
+    total = 0
+    for office_counters in read_counters().values():
+        for (subject, status), count in office_counters.items():
+            if subject != 'inquiry':
+                continue
+            total += count
+            if status in totals:
+                totals[status] += count
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start_of_week = today - timedelta(days=today.weekday())
+    start_of_last_week = start_of_week - timedelta(days=7)
+
+    this_week = Inquiry.created_at >= start_of_week
+    last_week = Inquiry.created_at < start_of_week
+
+    columns = [
+        func.count(Inquiry.id).filter(this_week).label('this_week_total'),
+        func.count(Inquiry.id).filter(last_week).label('last_week_total')
+    ]
+    for status in STATUSES:
+        columns.append(func.count(Inquiry.id).filter(this_week, Inquiry.status == status).label(f'this_week_{status}'))
+        columns.append(func.count(Inquiry.id).filter(last_week, Inquiry.status == status).label(f'last_week_{status}'))
+
+    window = db.session.query(*columns).filter(Inquiry.created_at >= start_of_last_week).one()
+
+    stats = {
+        'total': total,
+        'pending': totals['pending'],
+        'in_progress': totals['in_progress'],
+        'resolved': totals['resolved'],
+        'total_change': round(_percent_change(window.this_week_total, window.last_week_total))
+    }
+    for status in STATUSES:
+        stats[f'{status}_change'] = round(_percent_change(
+            getattr(window, f'this_week_{status}'),
+            getattr(window, f'last_week_{status}')
+        ))
+    return stats
+
+
+def get_inquiry_stats():
+    """Return inquiry statistics, served from a short-TTL cache"""
+    return _stats_cache.get_or_set('inquiry_stats', compute_inquiry_stats)
@@ -0,0 +1,256 @@
+"""
+Cursor (keyset) pagination for append-mostly log tables.
+
+Pages are addressed by the (timestamp, id) of the row at the page boundary
+instead of an OFFSET, so each page is one indexed range scan of per_page + 1
+rows no matter how deep it is, and no COUNT(*) is needed. Timelines merging
+several tables page on (timestamp, source, id) the same way, and lists
+without a timestamp page on their primary key alone.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_, text, func, select, union_all, and_
+
+from app.extensions import db
+
+
+class KeysetPage:
+    """One page of results plus the opaque tokens for its neighbours"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, approx_total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.approx_total = approx_total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(key, direction):
+    """
+    Build an opaque page token.
+
+    :param key: (timestamp, id) or (timestamp, source, id) of the boundary row
+    :param direction: 'next' for rows after the key, 'prev' for rows before it
+    """
+    timestamp, rest = key[0], list(key[1:])
+    return _pack({'t': timestamp.isoformat(), 'k': rest, 'd': direction})
+
+
+def _pack(payload):
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _unpack(token):
+    padded = token + '=' * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+
+
+def decode_cursor(token, key_types=(int,)):
+    """
+    Decode a page token.
+
+    :param key_types: Types of the key parts after the timestamp, e.g. (str, int) for (source, id)
+    :return: ((timestamp, ...), direction), or None if the token is missing or malformed
+    """
+    if not token:
+        return None
+    try:
+        payload = _unpack(token)
+        timestamp = datetime.fromisoformat(payload['t'])
+        rest = payload['k']
+        if len(rest) != len(key_types) or not all(isinstance(v, t) for v, t in zip(rest, key_types)):
+            return None
+        direction = payload['d'] if payload['d'] in ('next', 'prev') else 'next'
+        return (timestamp, *rest), direction
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+
+
+def paginate_keyset(query, timestamp_column, id_column, key, cursor=None, per_page=10, approx_total=None):
+    """
+    Fetch one page of a query ordered newest first by (timestamp_column, id_column).
+
+    Rows without a timestamp have no place in the ordering a cursor can point at,
+    so they are left out rather than sending "Next" back to the first page.
+
+    :param query: The filtered query; any existing ORDER BY is replaced
+    :param timestamp_column: The log's timestamp column
+    :param id_column: The log's primary key column, used as a tie-breaker
+    :param key: Function returning (timestamp, id) for a result row
+    :param cursor: Token from a previous page's next_cursor / prev_cursor
+    :param per_page: Number of rows per page
+    :param approx_total: Optional total to display alongside the page
+    :return: KeysetPage
+    """
+    decoded = decode_cursor(cursor)
+    boundary = tuple_(timestamp_column, id_column)
+    query = query.order_by(None).filter(timestamp_column.isnot(None))
+
+    if decoded and decoded[1] == 'prev':
+        # Walk towards newer rows, then flip back into display order
+        # The plain timestamp bound is implied by the row comparison, but lets
+        # PostgreSQL prune monthly partitions, which it cannot do from a row value
+        rows = query.filter(
+            timestamp_column >= decoded[0][0], boundary > tuple_(*decoded[0])
+        ).order_by(
+            timestamp_column.asc(), id_column.asc()
+        ).limit(per_page + 1).all()
+        has_newer = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_older = True
+    else:
+        if decoded:
+            query = query.filter(timestamp_column <= decoded[0][0], boundary < tuple_(*decoded[0]))
+        rows = query.order_by(
+            timestamp_column.desc(), id_column.desc()
+        ).limit(per_page + 1).all()
+        has_older = len(rows) > per_page
+        items = rows[:per_page]
+        has_newer = decoded is not None
+
+    next_cursor = encode_cursor(key(items[-1]), 'next') if items and has_older else None
+    prev_cursor = encode_cursor(key(items[0]), 'prev') if items and has_newer else None
+    return KeysetPage(items, per_page, next_cursor, prev_cursor, approx_total)
+
+
+def paginate_by_id(query, id_column, key, cursor=None, per_page=10, approx_total=None):
+    """
+    Fetch one page of a query ordered by its primary key alone, lowest id first.
+
+    For lists that have no timestamp to page on, such as the students or offices
+    behind a summary table. Every page is one range scan of the primary key index.
+
+    :param query: The filtered query; any existing ORDER BY is replaced
+    :param id_column: The primary key column
+    :param key: Function returning the id of a result row
+    :param cursor: Token from a previous page's next_cursor / prev_cursor
+    :param per_page: Number of rows per page
+    :param approx_total: Optional total to display alongside the page
+    :return: KeysetPage
+    """
+    decoded = None
+    if cursor:
+        try:
+            payload = _unpack(cursor)
+            if isinstance(payload['i'], int) and payload['d'] in ('next', 'prev'):
+                decoded = payload['i'], payload['d']
+        except (ValueError, TypeError, KeyError, AttributeError):
+            decoded = None
+    query = query.order_by(None)
+
+    if decoded and decoded[1] == 'prev':
+        rows = query.filter(id_column < decoded[0]).order_by(id_column.desc()).limit(per_page + 1).all()
+        has_before = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_after = True
+    else:
+        if decoded:
+            query = query.filter(id_column > decoded[0])
+        rows = query.order_by(id_column.asc()).limit(per_page + 1).all()
+        has_after = len(rows) > per_page
+        items = rows[:per_page]
+        has_before = decoded is not None
+
+    next_cursor = _pack({'i': key(items[-1]), 'd': 'next'}) if items and has_after else None
+    prev_cursor = _pack({'i': key(items[0]), 'd': 'prev'}) if items and has_before else None
+    return KeysetPage(items, per_page, next_cursor, prev_cursor, approx_total)
+
+
+def approximate_row_count(model):
+    """
+    Cheap estimate of a table's size for display next to a paginated list.
+
+    Uses the planner statistics in pg_class on PostgreSQL; other databases get an exact count.
+    A partitioned table has no statistics of its own (reltuples is -1 or 0), so its
+    estimate is the sum over its partitions. Returns None when no estimate is
+    available yet (table never analyzed).
+    """
+    if db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(
+            text(
+                "SELECT CASE WHEN parent.relkind = 'p' THEN ("
+                "  SELECT (sum(child.reltuples) FILTER (WHERE child.reltuples >= 0))::bigint"
+                "  FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+                "  WHERE pg_inherits.inhparent = parent.oid"
+                ") ELSE parent.reltuples::bigint END "
+                "FROM pg_class parent WHERE parent.oid = to_regclass(:name)"
+            ),
+            {'name': model.__tablename__}
+        ).scalar()
+        return estimate if estimate is not None and estimate >= 0 else None
+    return db.session.query(func.count()).select_from(model).scalar()
+
+
+def _branch_bound(source, timestamp_column, id_column, key, older):
+    """
+    Per-branch form of (timestamp, source, id) < key (or > key for newer rows).
+
+    The source is constant within a branch, so the row comparison reduces to a
+    condition on the branch's own (timestamp, id) index.
+    """
+    timestamp, key_source, key_id = key
+    if source == key_source:
+        if older:
+            return and_(timestamp_column <= timestamp, tuple_(timestamp_column, id_column) < tuple_(timestamp, key_id))
+        return and_(timestamp_column >= timestamp, tuple_(timestamp_column, id_column) > tuple_(timestamp, key_id))
+    if older:
+        return timestamp_column <= timestamp if source < key_source else timestamp_column < timestamp
+    return timestamp_column >= timestamp if source > key_source else timestamp_column > timestamp
+
+
+def paginate_timeline(branches, cursor=None, per_page=10):
+    """
+    Fetch one page of a merged timeline, newest first by (timestamp, source, id).
+
+    Each branch reads at most per_page + 1 rows from its own index before the
+    UNION ALL is merged, so the cost does not grow with the depth of the page.
+    Rows without a timestamp are left out, as in paginate_keyset.
+
+    :param branches: (query, timestamp_column, id_column, source) per table; each query
+                     selects columns labelled timestamp, source and id plus the shared projection
+    :param cursor: Token from a previous page's next_cursor / prev_cursor
+    :param per_page: Number of rows per page
+    :return: KeysetPage of result rows
+    """
+    decoded = decode_cursor(cursor, key_types=(str, int))
+    older = not (decoded and decoded[1] == 'prev')
+
+    limited = []
+    for query, timestamp_column, id_column, source in branches:
+        query = query.filter(timestamp_column.isnot(None))
+        if decoded:
+            query = query.filter(_branch_bound(source, timestamp_column, id_column, decoded[0], older))
+        if older:
+            query = query.order_by(timestamp_column.desc(), id_column.desc())
+        else:
+            query = query.order_by(timestamp_column.asc(), id_column.asc())
+        limited.append(select(query.limit(per_page + 1).subquery()))
+
+    merged = union_all(*limited).subquery()
+    ordering = (merged.c.timestamp, merged.c.source, merged.c.id)
+    rows = db.session.execute(
+        select(merged).order_by(*(c.desc() if older else c.asc() for c in ordering)).limit(per_page + 1)
+    ).all()
+
+    has_more = len(rows) > per_page
+    items = rows[:per_page] if older else list(reversed(rows[:per_page]))
+    has_older = has_more if older else True
+    has_newer = (decoded is not None) if older else has_more
+
+    def key(row):
+        return row.timestamp, row.source, row.id
+
+    next_cursor = encode_cursor(key(items[-1]), 'next') if items and has_older else None
+    prev_cursor = encode_cursor(key(items[0]), 'prev') if items and has_newer else None
+    return KeysetPage(items, per_page, next_cursor, prev_cursor)
@@ -0,0 +1,201 @@
+"""
+Compressed cold archive for log rows removed by retention.
+
+Rows are appended to ``<LOG_ARCHIVE_DIR>/<table>/<YYYY-MM>.jsonl.gz`` as JSON
+lines, one gzip member per day per archiving run, so each file is a valid gzip
+stream that is only ever appended to. Next to it ``<YYYY-MM>.idx.json`` records
+the byte offset, length, row count and highest id of every member by day, which
+lets the reader seek straight to the days it needs and decompress only those.
+
+Rows are archived before they are deleted, so a delete that fails after the
+archive was written hands the same rows over again on the next run. Archiving
+is idempotent: rows already in the day's members are skipped.
+"""
+from datetime import datetime, date, timedelta
+import gzip
+import json
+import os
+import threading
+
+_settings = {'dir': None, 'enabled': True}
+# Serialises appends so two purges in this process never interleave members
+_lock = threading.Lock()
+
+
+def init_app(app):
+    _settings['enabled'] = app.config.get('LOG_ARCHIVE_ENABLED', True)
+    _settings['dir'] = app.config.get('LOG_ARCHIVE_DIR') or os.path.join(app.instance_path, 'log_archive')
+
+
+def is_enabled():
+    return _settings['enabled']
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _paths(table, month):
+    """Return (data file, index file) for one table and 'YYYY-MM' month"""
+    base = os.path.join(_settings['dir'], table, month)
+    return base + '.jsonl.gz', base + '.idx.json'
+
+
+def read_index(table, month):
+    """
+    Read a month's index.
+
+    :return: {'YYYY-MM-DD': [[offset, length, rows, highest id], ...]}, empty if the month has no archive
+    """
+    _, index_path = _paths(table, month)
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_index(index_path, index):
+    # Written to a temporary file and renamed over the old one, so readers never see half an index
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, index_path)
+
+
+def archive_rows(table, timestamp_key, rows):
+    """
+    Append rows to a table's archive, one gzip member per day.
+
+    Rows already archived are skipped. When every id is above the highest id the
+    index records for that day, nothing has to be read; otherwise the day's members
+    are read once to find the ids already there.
+
+    The data is flushed to disk before the index points at it; a crash in between
+    only leaves unindexed bytes at the end of the file, which the reader never visits.
+
+    :param table: Log table name
+    :param timestamp_key: Key of the timestamp that decides the row's day and month
+    :param rows: Mappings of every column of the rows
+    :return: Number of rows newly archived
+    """
+    days = {}
+    for row in rows:
+        row = dict(row)
+        days.setdefault(row[timestamp_key].date().isoformat(), []).append(row)
+
+    months = {}
+    for day, day_rows in days.items():
+        months.setdefault(day[:7], []).append((day, day_rows))
+
+    archived = 0
+    with _lock:
+        for month, month_days in months.items():
+            data_path, index_path = _paths(table, month)
+            os.makedirs(os.path.dirname(data_path), exist_ok=True)
+            index = read_index(table, month)
+            written = False
+
+            with open(data_path, 'ab') as f:
+                for day, day_rows in month_days:
+                    day_rows = _unarchived(table, day, day_rows, index)
+                    if not day_rows:
+                        continue
+                    lines = [json.dumps(row, default=_json_default) for row in day_rows]
+                    member = gzip.compress(('\n'.join(lines) + '\n').encode('utf-8'))
+                    offset = f.tell()
+                    f.write(member)
+                    index.setdefault(day, []).append(
+                        [offset, len(member), len(lines), max(row['id'] for row in day_rows)]
+                    )
+                    archived += len(lines)
+                    written = True
+                f.flush()
+                os.fsync(f.fileno())
+
+            if written:
+                _write_index(index_path, index)
+
+    return archived
+
+
+def _unarchived(table, day, rows, index):
+    """Drop the rows of one day that its archived members already hold"""
+    members = index.get(day)
+    if not members:
+        return rows
+    highest = max(member[3] for member in members)
+    if all(row['id'] > highest for row in rows):
+        return rows
+    existing = {row['id'] for row in read_day(table, date.fromisoformat(day), index)}
+    return [row for row in rows if row['id'] not in existing]
+
+
+def list_months(table):
+    """Archived months of a table, oldest first, as 'YYYY-MM' strings"""
+    directory = os.path.join(_settings['dir'], table)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len('.jsonl.gz')] for name in os.listdir(directory) if name.endswith('.jsonl.gz'))
+
+
+def read_day(table, day, index=None):
+    """
+    Yield the archived rows of one day as dicts.
+
+    Only that day's gzip members are read: the index gives their offsets, so the
+    rest of the month's file is never decompressed.
+
+    :param day: The date to read
+    :param index: The month's index, when the caller has it already
+    """
+    month = day.strftime('%Y-%m')
+    index = read_index(table, month) if index is None else index
+    members = index.get(day.isoformat())
+    if not members:
+        return
+
+    data_path, _ = _paths(table, month)
+    with open(data_path, 'rb') as f:
+        for offset, length, *_ in members:
+            f.seek(offset)
+            for line in gzip.decompress(f.read(length)).decode('utf-8').splitlines():
+                yield json.loads(line)
+
+
+def search_archive(table, timestamp_key, date_from, date_to, term=None, limit=500):
+    """
+    Search a table's archive over a date range, newest first.
+
+    :param table: Log table name
+    :param timestamp_key: Key of the row timestamp, used to order each day
+    :param date_from: First day to search
+    :param date_to: Last day to search
+    :param term: Case-insensitive text matched against every value of the row
+    :param limit: Maximum number of rows to return
+    :return: (rows, True if more rows matched than limit)
+    """
+    term = term.lower() if term else None
+    results = []
+    indexes = {}
+
+    day = date_to
+    while day >= date_from:
+        month = day.strftime('%Y-%m')
+        if month not in indexes:
+            indexes[month] = read_index(table, month)
+
+        rows = sorted(read_day(table, day, indexes[month]), key=lambda row: row[timestamp_key], reverse=True)
+        for row in rows:
+            if term and term not in ' '.join(str(value) for value in row.values() if value is not None).lower():
+                continue
+            if len(results) == limit:
+                return results, True
+            results.append(row)
+        day -= timedelta(days=1)
+
+    return results, False
@@ -0,0 +1,122 @@
+from app.models import User, Student, Office
+from app.extensions import db
+from app.services.cache import TTLCache
+from sqlalchemy import event
+
+# Bounded LRU caches with expiry; entries are also dropped when the row changes
+_users = TTLCache(ttl=300, maxsize=5000)      # user_id -> {'full_name', 'short_name', 'role'}
+_students = TTLCache(ttl=300, maxsize=5000)   # student_id -> user_id
+_offices = TTLCache(ttl=300, maxsize=500)     # office_id -> name
+
+_MISSING = object()
+
+
+def init_app(app):
+    """Size the caches from config and register the invalidation listeners"""
+    ttl = app.config.get('NAME_CACHE_TTL', 300)
+    size = app.config.get('NAME_CACHE_SIZE', 5000)
+    for cache in (_users, _students, _offices):
+        cache.ttl = ttl
+    _users.maxsize = size
+    _students.maxsize = size
+
+    if not event.contains(db.session, 'after_flush', _note_changed_names):
+        event.listen(db.session, 'after_flush', _note_changed_names)
+        event.listen(db.session, 'after_commit', _invalidate_after_commit)
+        event.listen(db.session, 'after_soft_rollback', _forget_changes)
+
+
+def _note_changed_names(session, flush_context):
+    """Collect users, students and offices changed in this transaction"""
+    changed = session.info.setdefault('changed_names', set())
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, User):
+            changed.add(('user', obj.id))
+        elif isinstance(obj, Student):
+            changed.add(('student', obj.id))
+        elif isinstance(obj, Office):
+            changed.add(('office', obj.id))
+
+
+def _invalidate_after_commit(session):
+    for kind, key in session.info.pop('changed_names', ()):
+        if kind == 'user':
+            invalidate_user(key)
+        elif kind == 'student':
+            _students.pop(key)
+        elif kind == 'office':
+            invalidate_office(key)
+
+
+def _forget_changes(session, previous_transaction):
+    session.info.pop('changed_names', None)
+
+
+def invalidate_user(user_id):
+    _users.pop(user_id)
+
+
+def invalidate_office(office_id):
+    _offices.pop(office_id)
+
+
+def _user_display(user_id):
+    if not user_id:
+        return None
+
+    display = _users.get(user_id, _MISSING)
+    if display is _MISSING:
+        row = db.session.query(
+            User.first_name, User.middle_name, User.last_name, User.role
+        ).filter(User.id == user_id).first()
+        display = None
+        if row:
+            short_name = f"{row.first_name} {row.last_name}"
+            display = {
+                'full_name': f"{row.first_name} {row.middle_name} {row.last_name}" if row.middle_name else short_name,
+                'short_name': short_name,
+                'role': row.role
+            }
+        _users.set(user_id, display)
+    return display
+
+
+def get_user_name(user_id, default=None):
+    """Full display name of a user, as User.get_full_name() would return it"""
+    display = _user_display(user_id)
+    return display['full_name'] if display else default
+
+
+def get_user_short_name(user_id, default=None):
+    """First and last name of a user, without the middle name"""
+    display = _user_display(user_id)
+    return display['short_name'] if display else default
+
+
+def get_user_role(user_id, default=None):
+    display = _user_display(user_id)
+    return display['role'] if display else default
+
+
+def get_student_name(student_id, default=None):
+    """Full display name of the user behind a student record"""
+    if not student_id:
+        return default
+
+    user_id = _students.get(student_id, _MISSING)
+    if user_id is _MISSING:
+        user_id = db.session.query(Student.user_id).filter(Student.id == student_id).scalar()
+        _students.set(student_id, user_id)
+    return get_user_name(user_id, default)
+
+
+def get_office_name(office_id, default=None):
+    """Name of an office"""
+    if not office_id:
+        return default
+
+    name = _offices.get(office_id, _MISSING)
+    if name is _MISSING:
+        name = db.session.query(Office.name).filter(Office.id == office_id).scalar()
+        _offices.set(office_id, name)
+    return name if name is not None else default
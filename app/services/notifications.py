@@ -0,0 +1,70 @@
+from app.models import User, OfficeAdmin, Notification
+from app.extensions import db, socketio
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, literal
+
+
+def create_announcement_notifications(title, is_public, target_office_id=None):
+    """
+    Create one "New Announcement" notification per recipient with a single INSERT ... SELECT.
+
+    :param title: announcement title used in the notification message
+    :param is_public: notify every active user when True
+    :param target_office_id: otherwise notify the active admins of this office
+    :return: number of notifications created
+    """
+    recipients = select(
+        User.id,
+        literal("New Announcement"),
+        literal(f"New announcement: {title}"),
+        literal(False),
+        literal(datetime.utcnow())
+    ).where(User.is_active == True)
+
+    if not is_public:
+        recipients = recipients.join(OfficeAdmin, OfficeAdmin.user_id == User.id).where(
+            OfficeAdmin.office_id == target_office_id
+        )
+
+    result = db.session.execute(
+        Notification.__table__.insert().from_select(
+            ['user_id', 'title', 'message', 'is_read', 'created_at'], recipients
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _fan_out(app, data, author_id):
+    with app.app_context():
+        try:
+            count = create_announcement_notifications(
+                data.get('title'),
+                data.get('is_public', False),
+                data.get('target_office_id')
+            )
+            if author_id is None:
+                return
+            socketio.emit('announcement_notifications_sent', {
+                'announcement_id': data.get('id'),
+                'title': data.get('title'),
+                'count': count,
+                'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            }, room=f"user_{author_id}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error creating announcement notifications: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+def fan_out_announcement(data, author_id):
+    """
+    Create announcement notifications in a background task, off the socket handler.
+    The author receives an announcement_notifications_sent event with the count when done.
+
+    :param data: announcement payload (title, is_public, target_office_id, id)
+    :param author_id: user id of the announcement author, None to skip the completion event
+    """
+    socketio.start_background_task(_fan_out, current_app._get_current_object(), dict(data), author_id)
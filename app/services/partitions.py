@@ -0,0 +1,213 @@
+"""
+Monthly range partitioning of the log tables (PostgreSQL only).
+
+Each log table is partitioned by month on its timestamp column, with partitions
+named ``<table>_yYYYYmMM`` plus a ``<table>_default`` catch-all. Date-filtered
+queries are pruned to the matching months, future months are created ahead of
+time by ensure_partitions(), and retention drops (or detaches) a month once every
+row in it has outlived its retention_days instead of deleting row by row, after
+copying it to the cold archive.
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint
+
+from app.extensions import db
+from app.services import log_archive
+from app.services.retention import LOG_TABLES
+from app.services.search import TRIGRAM_COLUMNS
+
+MONTHS_AHEAD = 3
+ARCHIVE_BATCH_SIZE = 10000
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _partition_month(table, name):
+    """Month a partition covers, parsed from its name, or None for the default partition"""
+    suffix = name[len(table) + 1:]
+    if len(suffix) != 8 or suffix[0] != 'y' or suffix[5] != 'm':
+        return None
+    return datetime(int(suffix[1:5]), int(suffix[6:8]), 1)
+
+
+def is_partitioned(connection, table):
+    if connection.dialect.name != 'postgresql':
+        return False
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+    ).scalar()
+    return relkind == 'p'
+
+
+def list_partitions(connection, table):
+    """Names of the partitions attached to a partitioned table"""
+    return [row[0] for row in connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.oid = to_regclass(:table) ORDER BY child.relname"
+    ), {'table': table})]
+
+
+def ensure_partitions(connection, table, start=None, months_ahead=MONTHS_AHEAD, now=None):
+    """
+    Create the monthly partitions from start up to months_ahead past the current month.
+
+    If the default partition already holds rows of a new month (e.g. a future-dated
+    row), PostgreSQL refuses to create the month's partition, so those rows are moved
+    into it first.
+
+    :return: Names of the partitions created
+    """
+    now = now or datetime.utcnow()
+    month = _month_start(start or now)
+    last = _add_months(_month_start(now), months_ahead)
+    existing = set(list_partitions(connection, table))
+    created = []
+
+    while month <= last:
+        name = partition_name(table, month)
+        if name not in existing:
+            bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+            if f"{table}_default" in existing and _default_has_rows(connection, table, month):
+                _create_from_default(connection, table, name, month, bounds)
+            else:
+                connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+            created.append(name)
+        month = _add_months(month, 1)
+
+    if f"{table}_default" not in existing:
+        connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+        created.append(f"{table}_default")
+    return created
+
+
+def _timestamp_column_name(table):
+    return next(column.name for model, column in LOG_TABLES if model.__tablename__ == table)
+
+
+def _default_has_rows(connection, table, month):
+    column = _timestamp_column_name(table)
+    return connection.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {column} >= :start AND {column} < :end)"
+    ), {'start': month, 'end': _add_months(month, 1)}).scalar()
+
+
+def _create_from_default(connection, table, name, month, bounds):
+    """Build a month's partition as a plain table, move its rows out of the default partition, then attach it"""
+    column = _timestamp_column_name(table)
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE {column} >= :start AND {column} < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {'start': month, 'end': _add_months(month, 1)})
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+
+
+def ensure_all_partitions(months_ahead=MONTHS_AHEAD):
+    """Create upcoming partitions for every partitioned log table"""
+    created = []
+    with db.engine.begin() as connection:
+        for model, _ in LOG_TABLES:
+            if is_partitioned(connection, model.__tablename__):
+                created += ensure_partitions(connection, model.__tablename__, months_ahead=months_ahead)
+    return created
+
+
+def convert_to_partitioned(connection, model, timestamp_column, months_ahead=MONTHS_AHEAD):
+    """
+    Rebuild an existing log table as a monthly partitioned table, copying its rows.
+
+    Runs in the caller's transaction, so a failure leaves the original table untouched.
+    The primary key becomes (id, <timestamp>) as PostgreSQL requires; ids still come
+    from the original sequence. Rows without a timestamp get the epoch so they can be stored.
+
+    :return: Number of rows copied
+    """
+    table = model.__tablename__
+    column = timestamp_column.name
+    old = f"{table}_unpartitioned"
+
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+    connection.execute(text(f"UPDATE {table} SET {column} = to_timestamp(0) WHERE {column} IS NULL"))
+    oldest = connection.execute(text(f"SELECT min({column}) FROM {table} WHERE {column} > to_timestamp(0)")).scalar()
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    connection.execute(text(
+        f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({column})"
+    ))
+    # One partition per month of existing history; epoch-stamped rows land in the default partition
+    ensure_partitions(connection, table, start=oldest, months_ahead=months_ahead)
+
+    copied = connection.execute(text(f"INSERT INTO {table} SELECT * FROM {old}")).rowcount
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    connection.execute(text(f"DROP TABLE {old}"))
+
+    # Keys and indexes are built after the bulk copy, once their names are free again
+    connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {column})"))
+    for constraint in model.__table__.foreign_key_constraints:
+        connection.execute(AddConstraint(constraint))
+    for index in model.__table__.indexes:
+        index.create(connection)
+    for trigram_table, trigram_column in TRIGRAM_COLUMNS:
+        if trigram_table == table:
+            connection.execute(text(
+                f"CREATE INDEX ix_{table}_{trigram_column}_trgm ON {table} USING gin ({trigram_column} gin_trgm_ops)"
+            ))
+    return copied
+
+
+def _archive_partition(connection, table, name):
+    """Copy every row of a partition to the cold archive, reading it in batches"""
+    timestamp_key = _timestamp_column_name(table)
+    result = connection.execution_options(stream_results=True).execute(text(f"SELECT * FROM {name}"))
+    for rows in result.mappings().partitions(ARCHIVE_BATCH_SIZE):
+        log_archive.archive_rows(table, timestamp_key, rows)
+
+
+def drop_expired_partitions(connection, table, now=None, detach_only=False):
+    """
+    Remove monthly partitions in which every row has outlived its retention_days.
+
+    :param detach_only: Detach the partition and keep it as a plain table instead of dropping it
+    :return: Number of rows removed with the partitions
+    """
+    now = now or datetime.utcnow()
+    removed = 0
+
+    for name in list_partitions(connection, table):
+        month = _partition_month(table, name)
+        if month is None or _add_months(month, 1) > now:
+            continue
+
+        rows, longest, keeps_forever = connection.execute(text(
+            f"SELECT count(*), max(retention_days), bool_or(retention_days IS NULL) FROM {name}"
+        )).one()
+        if keeps_forever:
+            continue
+        # The newest row in the month expires last; once it has, the whole month can go
+        if rows and (now - _add_months(month, 1)).days < longest:
+            continue
+
+        if log_archive.is_enabled():
+            _archive_partition(connection, table, name)
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if not detach_only:
+            connection.execute(text(f"DROP TABLE {name}"))
+        removed += rows
+    return removed
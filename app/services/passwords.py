@@ -0,0 +1,50 @@
+"""
+Password hashing off the eventlet hub.
+
+PBKDF2 and scrypt are pure CPU work, so under eventlet a single hash stalls every
+socket client for its whole duration. When the process is monkey-patched the work
+is handed to eventlet's native thread pool; otherwise it runs inline.
+"""
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app.services.green_db import running_under_eventlet
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+
+def init_app(app):
+    """Size eventlet's native thread pool for hashing work"""
+    if running_under_eventlet():
+        from eventlet import tpool
+        tpool.set_num_threads(app.config.get('PASSWORD_HASH_THREADS', 4))
+
+
+def _offload(func, *args, **kwargs):
+    if running_under_eventlet():
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+def hash_password(password):
+    """
+    Hash a password with the configured method and cost.
+
+    :param password: The plain-text password
+    :return: The encoded hash to store in User.password_hash
+    """
+    method = current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    return _offload(generate_password_hash, password, method=method)
+
+
+def verify_password(password_hash, password):
+    """
+    Check a plain-text password against a stored hash.
+
+    :param password_hash: The stored hash, in any format werkzeug understands
+    :param password: The plain-text password
+    """
+    if not password_hash or password is None:
+        return False
+    return _offload(check_password_hash, password_hash, password)
@@ -0,0 +1,179 @@
+"""
+Retention enforcement for the log tables.
+
+Each log row carries its own ``retention_days``. Expired rows are deleted in
+small batches, one short transaction per batch with a pause in between, so the
+purge never holds long locks or produces a burst of WAL. Each batch selects
+its ids through the timestamp index, one retention value at a time, and is
+written to the cold archive (app/services/log_archive.py) before it is deleted.
+Only one purge runs at a time: on PostgreSQL across every process through an
+advisory lock, elsewhere within the process.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import threading
+
+from sqlalchemy import delete, select, text
+
+from app.extensions import db, socketio
+from app.services import log_archive
+from app.models import AuditLog, StudentActivityLog, OfficeLoginLog, SuperAdminActivityLog
+
+# (model, column the retention period counts from)
+LOG_TABLES = (
+    (AuditLog, AuditLog.timestamp),
+    (StudentActivityLog, StudentActivityLog.timestamp),
+    (OfficeLoginLog, OfficeLoginLog.login_time),
+    (SuperAdminActivityLog, SuperAdminActivityLog.timestamp),
+)
+
+# Arbitrary application-wide key of the advisory lock held while purging
+PURGE_LOCK_KEY = 7301
+
+_settings = {'batch_size': 1000, 'pause': 0.1, 'interval': 24 * 3600, 'detach_partitions': False}
+_state = {'running': False}
+_local_lock = threading.Lock()
+
+
+def init_app(app):
+    _settings['batch_size'] = app.config.get('LOG_RETENTION_BATCH_SIZE', 1000)
+    _settings['pause'] = app.config.get('LOG_RETENTION_BATCH_PAUSE_MS', 100) / 1000.0
+    _settings['interval'] = app.config.get('LOG_RETENTION_INTERVAL_HOURS', 24) * 3600
+    _settings['detach_partitions'] = app.config.get('LOG_RETENTION_DETACH_PARTITIONS', False)
+    log_archive.init_app(app)
+
+
+def purge_expired_rows(model, timestamp_column, now=None, batch_size=None, pause=None):
+    """
+    Delete the expired rows of one log table.
+
+    :param model: The log model
+    :param timestamp_column: Column the retention period counts from
+    :param now: Reference time, defaults to the current UTC time
+    :param batch_size: Rows deleted per transaction
+    :param pause: Seconds to sleep between batches
+    :return: Number of rows deleted
+    """
+    now = now or datetime.utcnow()
+    table = model.__table__
+    batch_size = batch_size or _settings['batch_size']
+    pause = _settings['pause'] if pause is None else pause
+
+    retention_values = [
+        value for (value,) in db.session.query(model.retention_days).distinct().all()
+        if value is not None
+    ]
+    db.session.commit()
+
+    purged = 0
+    for retention_days in sorted(retention_values):
+        cutoff = now - timedelta(days=retention_days)
+        expired = select(*table.c).where(
+            model.retention_days == retention_days,
+            timestamp_column < cutoff
+        ).order_by(timestamp_column).limit(batch_size)
+        expired_ids = expired.with_only_columns(model.id)
+
+        while True:
+            if log_archive.is_enabled():
+                rows = db.session.execute(expired).mappings().all()
+                log_archive.archive_rows(table.name, timestamp_column.name, rows)
+                condition = model.id.in_([row['id'] for row in rows])
+            else:
+                condition = model.id.in_(expired_ids)
+            deleted = db.session.execute(
+                delete(model).where(condition).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            purged += deleted
+            if deleted < batch_size:
+                break
+            socketio.sleep(pause)
+    return purged
+
+
+@contextmanager
+def _purge_lock():
+    """Yield True if this caller may purge, False while another purge holds the lock"""
+    if db.engine.dialect.name != 'postgresql':
+        acquired = _local_lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _local_lock.release()
+        return
+
+    # Session-level lock on a connection of its own, held until the purge is done
+    with db.engine.connect() as connection:
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': PURGE_LOCK_KEY}).scalar()
+        connection.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': PURGE_LOCK_KEY})
+                connection.commit()
+
+
+def purge_expired_logs(now=None, batch_size=None, pause=None):
+    """
+    Apply retention_days to every log table.
+
+    :return: {table name: rows deleted}, or None if another purge is already running
+    """
+    with _purge_lock() as acquired:
+        if not acquired:
+            return None
+        return _purge_all_tables(now, batch_size, pause)
+
+
+def _purge_all_tables(now, batch_size, pause):
+    from app.services import partitions
+
+    report = {}
+    for model, timestamp_column in LOG_TABLES:
+        table = model.__tablename__
+        purged = 0
+        # Whole expired months of a partitioned table go at once; the batched
+        # DELETE then only has the partially expired months left to visit
+        with db.engine.begin() as connection:
+            if partitions.is_partitioned(connection, table):
+                purged += partitions.drop_expired_partitions(
+                    connection, table, now, detach_only=_settings['detach_partitions']
+                )
+        purged += purge_expired_rows(model, timestamp_column, now, batch_size, pause)
+        report[table] = purged
+    return report
+
+
+def start_schedule(app):
+    """Run purge_expired_logs every LOG_RETENTION_INTERVAL_HOURS in a background task"""
+    if _state['running'] or not app.config.get('LOG_RETENTION_ENABLED', True):
+        return
+    _state['running'] = True
+    socketio.start_background_task(_run_schedule, app)
+
+
+def _run_schedule(app):
+    while True:
+        with app.app_context():
+            # A failure to create next month's partitions must not hold up the purge
+            try:
+                from app.services.partitions import ensure_all_partitions
+                ensure_all_partitions()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error creating log partitions: {str(e)}")
+            try:
+                report = purge_expired_logs()
+                if report is None:
+                    print("Log retention purge skipped: another purge is running")
+                else:
+                    print(f"Log retention purge: {report}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error purging expired logs: {str(e)}")
+            finally:
+                db.session.remove()
+        socketio.sleep(_settings['interval'])
@@ -0,0 +1,103 @@
+"""
+Substring search for the admin list views.
+
+On PostgreSQL the searched columns carry pg_trgm GIN indexes (created by
+``flask database create-indexes``), which serve ``ILIKE '%term%'`` directly.
+Matches on the user's name or email are resolved to ids first, so the log
+table is filtered on indexed columns of its own instead of an OR across a join.
+Other databases (SQLite in development) run the same ILIKE without the indexes.
+"""
+from sqlalchemy import or_, text
+
+from app.extensions import db
+from app.models import User, Student, Office, OfficeAdmin
+
+# Columns searched with ILIKE '%term%' that get a trigram index
+TRIGRAM_COLUMNS = (
+    ('users', 'first_name'),
+    ('users', 'last_name'),
+    ('users', 'email'),
+    ('students', 'student_number'),
+    ('offices', 'name'),
+    ('inquiries', 'subject'),
+    ('audit_logs', 'action'),
+    ('audit_logs', 'target_type'),
+    ('student_activity_logs', 'action'),
+    ('super_admin_activity_logs', 'action'),
+    ('super_admin_activity_logs', 'target_type'),
+)
+
+# Above this many matching users the ids are not inlined; a subquery is used instead
+MAX_INLINE_IDS = 500
+
+
+def like_pattern(term):
+    """ILIKE pattern matching term anywhere, with LIKE wildcards in the term escaped"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def text_match(term, *columns):
+    """Condition true when any of the columns contains term, case-insensitively"""
+    pattern = like_pattern(term)
+    return or_(*(column.ilike(pattern, escape='\\') for column in columns))
+
+
+def _ids_or_subquery(query):
+    ids = [row[0] for row in query.limit(MAX_INLINE_IDS + 1).all()]
+    if len(ids) > MAX_INLINE_IDS:
+        return query.subquery().select()
+    return ids
+
+
+def matching_user_ids(term):
+    """Ids of users whose first name, last name or email contains term"""
+    return _ids_or_subquery(
+        db.session.query(User.id).filter(text_match(term, User.first_name, User.last_name, User.email))
+    )
+
+
+def matching_student_ids(term, include_student_number=False):
+    """Ids of students whose user matches term (and, optionally, whose student number does)"""
+    condition = text_match(term, User.first_name, User.last_name, User.email)
+    if include_student_number:
+        condition = or_(condition, text_match(term, Student.student_number))
+    return _ids_or_subquery(
+        db.session.query(Student.id).join(User, Student.user_id == User.id).filter(condition)
+    )
+
+
+def matching_office_admin_ids(term):
+    """Ids of office admin assignments whose user or office matches term"""
+    return _ids_or_subquery(
+        db.session.query(OfficeAdmin.id).join(
+            User, OfficeAdmin.user_id == User.id
+        ).join(
+            Office, OfficeAdmin.office_id == Office.id
+        ).filter(
+            or_(text_match(term, User.first_name, User.last_name, User.email), text_match(term, Office.name))
+        )
+    )
+
+
+def create_trigram_indexes(connection):
+    """
+    Create the pg_trgm extension and the GIN indexes in TRIGRAM_COLUMNS.
+
+    :param connection: An AUTOCOMMIT connection, since CREATE INDEX CONCURRENTLY cannot run in a transaction
+    :return: Names of the indexes ensured
+    """
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    names = []
+    for table, column in TRIGRAM_COLUMNS:
+        name = f"ix_{table}_{column}_trgm"
+        relkind = connection.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': table}
+        ).scalar()
+        # Partitioned tables (see app/services/partitions.py) cannot be indexed concurrently
+        concurrently = '' if relkind == 'p' else 'CONCURRENTLY '
+        connection.execute(text(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"
+        ))
+        names.append(name)
+    return names
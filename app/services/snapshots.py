@@ -0,0 +1,94 @@
+import copy
+import threading
+import time
+
+# Fields that change on every computation and never count as a change on their own
+VOLATILE_FIELDS = ('timestamp',)
+
+
+class VersionedSnapshot:
+    """
+    Keep the last published payload of a broadcast channel and diff new payloads against it.
+
+    Every publish that changes something bumps a monotonically increasing
+    version. Deltas carry only the changed top-level fields plus the version;
+    list fields named in ``keyed_lists`` are diffed per item, sending the
+    changed items under the same key and removed keys under ``<field>_removed``.
+    A client whose version is not exactly ``version - 1`` should ask for the
+    full snapshot instead of applying the delta.
+    """
+
+    def __init__(self, keyed_lists=None):
+        self.keyed_lists = keyed_lists or {}
+        self.version = 0
+        self.snapshot = None
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _diff_list(self, field, old_items, new_items):
+        key = self.keyed_lists[field]
+        old_by_key = {item[key]: item for item in old_items or []}
+        new_by_key = {item[key]: item for item in new_items or []}
+        changed = [item for item_key, item in new_by_key.items() if old_by_key.get(item_key) != item]
+        removed = [item_key for item_key in old_by_key if item_key not in new_by_key]
+        return changed, removed
+
+    def _diff(self, old, new):
+        delta = {}
+        for field, value in new.items():
+            if field in VOLATILE_FIELDS or (field in old and old[field] == value):
+                continue
+            if field in self.keyed_lists:
+                changed, removed = self._diff_list(field, old.get(field), value)
+                if changed:
+                    delta[field] = changed
+                if removed:
+                    delta[f"{field}_removed"] = removed
+            else:
+                delta[field] = value
+        return delta
+
+    def publish(self, payload):
+        """
+        Record a freshly computed payload.
+
+        :param payload: the complete payload for the channel
+        :return: the delta to broadcast, or None when nothing changed
+        """
+        with self._lock:
+            # Recomputed now, whether or not anything changed
+            self.refreshed_at = time.monotonic()
+            is_full = self.snapshot is None
+            if is_full:
+                delta = {field: value for field, value in payload.items() if field not in VOLATILE_FIELDS}
+            else:
+                delta = self._diff(self.snapshot, payload)
+
+            if not delta:
+                return None
+
+            self.version += 1
+            self.snapshot = copy.deepcopy(payload)
+
+            for field in VOLATILE_FIELDS:
+                if field in payload:
+                    delta[field] = payload[field]
+            delta['version'] = self.version
+            delta['full'] = is_full
+            return delta
+
+    def age(self):
+        """Seconds since the payload was last recomputed, or None if it never was"""
+        if self.refreshed_at is None:
+            return None
+        return time.monotonic() - self.refreshed_at
+
+    def full(self):
+        """Return the last published payload with its version, for clients that missed a delta"""
+        with self._lock:
+            if self.snapshot is None:
+                return None
+            payload = copy.deepcopy(self.snapshot)
+            payload['version'] = self.version
+            payload['full'] = True
+            return payload
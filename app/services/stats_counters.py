@@ -0,0 +1,253 @@
+from app.models import Inquiry, CounselingSession, StatsCounter, InquiryDailyRollup
+from app.extensions import db
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, func, inspect
+
+# Model class -> counter subject
+COUNTED_MODELS = {
+    Inquiry: 'inquiry',
+    CounselingSession: 'session'
+}
+
+DEFAULT_STATUS = 'pending'
+
+
+# Attributes whose previous value decides which counter to decrement
+TRACKED_ATTRIBUTES = ('office_id', 'status')
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """Attribute 'set' hook; registered with active_history so the old value is loaded"""
+
+
+def init_app(app):
+    """Register the flush listener that keeps stats_counters in sync"""
+    if event.contains(db.session, 'after_flush', _apply_counter_deltas):
+        return
+
+    # Without active history, assigning to an expired attribute (the normal
+    # case after a commit) records no previous value to decrement.
+    for model in COUNTED_MODELS:
+        for attr in TRACKED_ATTRIBUTES:
+            event.listen(getattr(model, attr), 'set', _keep_old_value, active_history=True)
+    event.listen(Inquiry.created_at, 'set', _keep_old_value, active_history=True)
+
+    event.listen(db.session, 'after_flush', _apply_counter_deltas)
+
+
+def _old_and_new(obj, attr):
+    """Return the (previous, current) value of an attribute for a dirty object"""
+    history = inspect(obj).attrs[attr].load_history()
+    current = history.added[0] if history.added else (history.unchanged[0] if history.unchanged else None)
+    previous = history.deleted[0] if history.deleted else current
+    return previous, current
+
+
+def _collect_deltas(session):
+    """Work out how each (office, subject, status) counter moves in this flush"""
+    deltas = defaultdict(int)
+
+    for obj in session.new:
+        subject = COUNTED_MODELS.get(type(obj))
+        if subject:
+            deltas[(obj.office_id, subject, obj.status or DEFAULT_STATUS)] += 1
+
+    for obj in session.deleted:
+        subject = COUNTED_MODELS.get(type(obj))
+        if subject:
+            office_id, _ = _old_and_new(obj, 'office_id')
+            status, _ = _old_and_new(obj, 'status')
+            deltas[(office_id, subject, status or DEFAULT_STATUS)] -= 1
+
+    for obj in session.dirty:
+        subject = COUNTED_MODELS.get(type(obj))
+        if not subject or not session.is_modified(obj):
+            continue
+        old_office, new_office = _old_and_new(obj, 'office_id')
+        old_status, new_status = _old_and_new(obj, 'status')
+        if old_office == new_office and old_status == new_status:
+            continue
+        deltas[(old_office, subject, old_status or DEFAULT_STATUS)] -= 1
+        deltas[(new_office, subject, new_status or DEFAULT_STATUS)] += 1
+
+    return {key: delta for key, delta in deltas.items() if delta and key[0] is not None}
+
+
+def _collect_rollup_deltas(session):
+    """Work out how each (day, office) inquiry rollup row moves in this flush"""
+    deltas = defaultdict(lambda: [0, 0])  # (day, office_id) -> [new, resolved]
+
+    def day_of(created_at):
+        return (created_at or datetime.utcnow()).date()
+
+    for obj in session.new:
+        if isinstance(obj, Inquiry):
+            row = deltas[(day_of(obj.created_at), obj.office_id)]
+            row[0] += 1
+            row[1] += 1 if obj.status == 'resolved' else 0
+
+    for obj in session.deleted:
+        if isinstance(obj, Inquiry):
+            created_at, _ = _old_and_new(obj, 'created_at')
+            office_id, _ = _old_and_new(obj, 'office_id')
+            status, _ = _old_and_new(obj, 'status')
+            row = deltas[(day_of(created_at), office_id)]
+            row[0] -= 1
+            row[1] -= 1 if status == 'resolved' else 0
+
+    for obj in session.dirty:
+        if not isinstance(obj, Inquiry) or not session.is_modified(obj):
+            continue
+        old_created, new_created = _old_and_new(obj, 'created_at')
+        old_office, new_office = _old_and_new(obj, 'office_id')
+        old_status, new_status = _old_and_new(obj, 'status')
+        old_key = (day_of(old_created), old_office)
+        new_key = (day_of(new_created), new_office)
+        if old_key == new_key and old_status == new_status:
+            continue
+        deltas[old_key][0] -= 1
+        deltas[old_key][1] -= 1 if old_status == 'resolved' else 0
+        deltas[new_key][0] += 1
+        deltas[new_key][1] += 1 if new_status == 'resolved' else 0
+
+    return {
+        key: {'new_count': new, 'resolved_count': resolved}
+        for key, (new, resolved) in deltas.items()
+        if (new or resolved) and key[1] is not None
+    }
+
+
+def _upsert_increments(connection, table, keys, increments):
+    """
+    Add ``increments`` to the row identified by ``keys``, creating it if missing.
+
+    :param keys: primary key column name -> value
+    :param increments: counter column name -> delta
+    """
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**keys, **increments).on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={name: table.c[name] + delta for name, delta in increments.items()}
+        )
+        connection.execute(stmt)
+        return
+
+    where = [table.c[name] == value for name, value in keys.items()]
+    result = connection.execute(
+        table.update().where(*where).values(
+            {table.c[name]: table.c[name] + delta for name, delta in increments.items()}
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**keys, **increments))
+
+
+def _apply_counter_deltas(session, flush_context):
+    """after_flush listener: upsert counter and rollup rows inside the flushing transaction"""
+    counter_deltas = _collect_deltas(session)
+    rollup_deltas = _collect_rollup_deltas(session)
+    if not counter_deltas and not rollup_deltas:
+        return
+
+    connection = session.connection()
+
+    for (office_id, subject, status), delta in counter_deltas.items():
+        _upsert_increments(
+            connection, StatsCounter.__table__,
+            {'office_id': office_id, 'subject': subject, 'status': status},
+            {'count': delta}
+        )
+
+    for (day, office_id), increments in rollup_deltas.items():
+        _upsert_increments(
+            connection, InquiryDailyRollup.__table__,
+            {'day': day, 'office_id': office_id},
+            increments
+        )
+
+
+def read_counters():
+    """
+    Read every counter row.
+
+    :return: dict of office_id -> {(subject, status): count}
+    """
+    counters = defaultdict(dict)
+    for row in db.session.query(StatsCounter.office_id, StatsCounter.subject,
+                                StatsCounter.status, StatsCounter.count):
+        counters[row.office_id][(row.subject, row.status)] = row.count
+    return counters
+
+
+def _actual_counts():
+    """Count the base tables grouped by office and status"""
+    actual = {}
+    for model, subject in COUNTED_MODELS.items():
+        rows = db.session.query(
+            model.office_id,
+            func.coalesce(model.status, DEFAULT_STATUS).label('status'),
+            func.count(model.id).label('count')
+        ).group_by(model.office_id, func.coalesce(model.status, DEFAULT_STATUS)).all()
+        for row in rows:
+            actual[(row.office_id, subject, row.status)] = row.count
+    return actual
+
+
+def reconcile_counters(fix=True):
+    """
+    Compare stats_counters with the base tables and optionally rebuild it.
+
+    Bulk ``query.update()`` calls and raw SQL bypass the flush listener,
+    so this is the way to detect and repair drift.
+
+    :param fix: rewrite the counters table when drift is found
+    :return: list of (office_id, subject, status, stored, actual) tuples that differ
+    """
+    actual = _actual_counts()
+    stored = {}
+    for office_id, values in read_counters().items():
+        for (subject, status), count in values.items():
+            stored[(office_id, subject, status)] = count
+
+    drift = []
+    for key in sorted(set(actual) | set(stored), key=lambda k: (k[0], k[1], k[2] or '')):
+        if actual.get(key, 0) != stored.get(key, 0):
+            drift.append(key + (stored.get(key, 0), actual.get(key, 0)))
+
+    if fix and drift:
+        db.session.query(StatsCounter).delete(synchronize_session=False)
+        if actual:
+            db.session.execute(StatsCounter.__table__.insert(), [
+                {'office_id': office_id, 'subject': subject, 'status': status, 'count': count}
+                for (office_id, subject, status), count in actual.items()
+            ])
+        db.session.commit()
+
+    return drift
+
+
+
+def rebuild_inquiry_rollups():
+    """
+    Rebuild inquiry_daily_rollups from the full inquiry history.
+
+    :return: number of (day, office) rows written
+    """
+    day = func.date(Inquiry.created_at)
+    history = db.session.query(
+        day.label('day'),
+        Inquiry.office_id,
+        func.count(Inquiry.id).label('new_count'),
+        func.count(Inquiry.id).filter(Inquiry.status == 'resolved').label('resolved_count')
+    ).filter(Inquiry.created_at.isnot(None)).group_by(day, Inquiry.office_id)
+
+    table = InquiryDailyRollup.__table__
+    db.session.query(InquiryDailyRollup).delete(synchronize_session=False)
+    db.session.execute(table.insert().from_select(
+        ['day', 'office_id', 'new_count', 'resolved_count'], history
+    ))
+    db.session.commit()
+
+    return db.session.query(func.count()).select_from(table).scalar()
@@ -0,0 +1,117 @@
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, OfficeAdmin
+from app.services.cache import TTLCache
+
+# user_id -> identity dict; short TTL, also dropped when the user row changes
+_identities = TTLCache(ttl=60, maxsize=10000)
+
+_MISSING = object()
+
+
+def init_app(app):
+    """Size the identity cache from config and register the invalidation listeners"""
+    _identities.ttl = app.config.get('USER_CACHE_TTL', 60)
+    _identities.maxsize = app.config.get('USER_CACHE_SIZE', 10000)
+
+    if not event.contains(db.session, 'after_flush', _note_changed_users):
+        event.listen(db.session, 'after_flush', _note_changed_users)
+        event.listen(db.session, 'after_commit', _invalidate_after_commit)
+        event.listen(db.session, 'after_soft_rollback', _forget_changes)
+
+
+class CachedUser(UserMixin):
+    """
+    Lightweight stand-in for a User served to Flask-Login as current_user.
+
+    Identity fields (id, role, names, email, is_active, office_id) come from the
+    cache. Anything else, and every write, goes to the real User row, which is
+    loaded at most once per request.
+    """
+
+    def __init__(self, identity):
+        object.__setattr__(self, '_identity', dict(identity))
+        object.__setattr__(self, '_user', None)
+
+    def _load(self):
+        user = self.__dict__['_user']
+        if user is None:
+            user = db.session.get(User, self.__dict__['_identity']['id'])
+            object.__setattr__(self, '_user', user)
+        return user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        identity = self.__dict__['_identity']
+        if name in identity:
+            return identity[name]
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        # Later reads must see the new value, so stop answering this field from the cache
+        self.__dict__['_identity'].pop(name, None)
+        setattr(self._load(), name, value)
+
+    @property
+    def is_active(self):
+        identity = self.__dict__['_identity']
+        if 'is_active' in identity:
+            return identity['is_active']
+        return self._load().is_active
+
+    def get_full_name(self):
+        if self.middle_name:
+            return f"{self.first_name} {self.middle_name} {self.last_name}"
+        return f"{self.first_name} {self.last_name}"
+
+    def __repr__(self):
+        return f"<CachedUser {self.__dict__['_identity'].get('id')}>"
+
+
+def _load_identity(user_id):
+    row = db.session.query(
+        User.id, User.role, User.first_name, User.middle_name, User.last_name,
+        User.email, User.profile_pic, User.is_active, OfficeAdmin.office_id
+    ).outerjoin(OfficeAdmin, OfficeAdmin.user_id == User.id).filter(User.id == user_id).first()
+    return dict(row._mapping) if row else None
+
+
+def load_cached_user(user_id):
+    """
+    Flask-Login user loader backed by the identity cache.
+
+    :param user_id: The id stored in the session cookie
+    :return: A CachedUser, or None if the user no longer exists
+    """
+    identity = _identities.get(user_id, _MISSING)
+    if identity is _MISSING:
+        identity = _load_identity(user_id)
+        _identities.set(user_id, identity)
+    return CachedUser(identity) if identity else None
+
+
+def invalidate_user(user_id):
+    _identities.pop(user_id)
+
+
+def _note_changed_users(session, flush_context):
+    """Collect users whose identity may have changed in this transaction"""
+    changed = session.info.setdefault('changed_user_identities', set())
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, OfficeAdmin) and obj.user_id:
+            changed.add(obj.user_id)
+
+
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop('changed_user_identities', ()):
+        invalidate_user(user_id)
+
+
+def _forget_changes(session, previous_transaction):
+    session.info.pop('changed_user_identities', None)
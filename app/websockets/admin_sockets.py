@@ -1,11 +1,23 @@
 from flask_socketio import emit, join_room, leave_room
 from flask_login import current_user
+from flask import current_app
 from app.models import (
     User, Inquiry, CounselingSession, AuditLog, Office, 
     Notification, OfficeAdmin, Student, SuperAdminActivityLog,
     OfficeLoginLog, StudentActivityLog
 )
 from app.extensions import db, socketio
+from app.services.dashboard_stats import (
+    compute_dashboard_stats, realtime_stats_payload, office_stats_payload,
+    compute_admin_management_stats
+)
+from app.services.snapshots import VersionedSnapshot
+from app.services.broadcaster import DebouncedBroadcaster
+from app.services.notifications import fan_out_announcement
+from app.services.user_cache import CachedUser
+from app.services.name_cache import (
+    get_user_name, get_user_short_name, get_user_role, get_student_name, get_office_name
+)
 from datetime import datetime
 import json
 
@@ -39,24 +51,30 @@ def register_connection_handlers():
             if current_user.role == 'super_admin':
                 join_room('super_admin_room')
                 print(f"Super Admin {current_user.email} joined super_admin_room")
+            else:
+                # Office admins only receive inquiry, session and stats traffic of their office
+                office_id = get_admin_office_id(current_user)
+                if office_id:
+                    join_room(office_room(office_id))
             
             print(f"Admin {current_user.email} joined admin_room")
             
-            # Log the connection
+            # Log the connection (buffered, so connecting costs no commit)
             if current_user.role == 'super_admin':
                 SuperAdminActivityLog.log_action(
                     super_admin=current_user,
                     action="WebSocket Connect",
                     target_type="system",
-                    details="Super admin real-time dashboard connection"
+                    details="Super admin real-time dashboard connection",
+                    buffered=True
                 )
             else:
                 AuditLog.log_action(
                     actor=current_user,
                     action="WebSocket Connect",
-                    target_type="system"
+                    target_type="system",
+                    buffered=True
                 )
-            db.session.commit()
             
             emit('connection_success', {
                 'status': 'connected', 
@@ -71,27 +89,37 @@ def register_connection_handlers():
                 leave_room('admin_room')
                 leave_room(f"user_{current_user.id}")
                 
+                if current_user.role != 'super_admin':
+                    office_id = get_admin_office_id(current_user)
+                    if office_id:
+                        leave_room(office_room(office_id))
+                
                 if current_user.role == 'super_admin':
                     leave_room('super_admin_room')
                     SuperAdminActivityLog.log_action(
                         super_admin=current_user,
                         action="WebSocket Disconnect",
                         target_type="system",
-                        details="Super admin real-time dashboard disconnection"
+                        details="Super admin real-time dashboard disconnection",
+                        buffered=True
                     )
                 else:
                     AuditLog.log_action(
                         actor=current_user,
                         action="WebSocket Disconnect",
-                        target_type="system"
+                        target_type="system",
+                        buffered=True
                     )
-                db.session.commit()
 
 def register_inquiry_handlers():
     @socketio.on('join_admin_room')
     def handle_join_admin_room(sid):
         if current_user.is_authenticated and current_user.role in ['super_admin', 'office_admin']:
             join_room('admin_room')
+            if current_user.role == 'office_admin':
+                office_id = get_admin_office_id(current_user)
+                if office_id:
+                    join_room(office_room(office_id))
             print(f"Admin {current_user.email} joined admin_room")
             emit('connection_success', {
                 'status': 'connected', 
@@ -101,28 +129,28 @@ def register_inquiry_handlers():
     
     @socketio.on('new_inquiry_created')
     def handle_new_inquiry(data):
-        emit('new_inquiry', {
+        emit_to_office('new_inquiry', {
             'student_name': data.get('student_name', 'Unknown Student'),
             'subject': data.get('subject', 'New Inquiry'),
             'office_id': data.get('office_id'),
             'office_name': data.get('office_name', 'Unknown Office'),
             'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }, room='admin_room')
+        }, data.get('office_id'))
 
     @socketio.on('inquiry_resolved')
     def handle_inquiry_resolved(data):
-        emit('resolved_inquiry', {
+        emit_to_office('resolved_inquiry', {
             'admin_name': data.get('admin_name', current_user.first_name if current_user.is_authenticated else 'Unknown Admin'),
             'inquiry_id': data.get('inquiry_id'),
             'office_id': data.get('office_id'),
             'office_name': data.get('office_name', 'Unknown Office'),
             'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }, room='admin_room')
+        }, data.get('office_id'))
 
 def register_session_handlers():
     @socketio.on('counseling_session_created')
     def handle_new_session(data):
-        emit('new_session', {
+        emit_to_office('new_session', {
             'student_name': data.get('student_name', 'Unknown Student'),
             'office_name': data.get('office_name', 'Unknown Office'),
             'office_id': data.get('office_id'),
@@ -130,20 +158,21 @@ def register_session_handlers():
             'scheduled_at': data.get('scheduled_at'),
             'session_id': data.get('session_id'),
             'status': data.get('status', 'scheduled')
-        }, room='admin_room')
+        }, data.get('office_id'))
     
     @socketio.on('counseling_session_updated')
     def handle_session_update(data):
-        emit('session_update', {
+        emit_to_office('session_update', {
             'session_id': data.get('session_id'),
             'student_name': data.get('student_name', 'Unknown Student'),
             'office_name': data.get('office_name', 'Unknown Office'),
+            'office_id': data.get('office_id'),
             'counselor_name': data.get('counselor_name', 'Unassigned'),
             'scheduled_at': data.get('scheduled_at'),
             'status': data.get('status', 'updated'),
             'updated_by': data.get('updated_by', current_user.get_full_name() if current_user.is_authenticated else 'System'),
             'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }, room='admin_room')
+        }, data.get('office_id'))
 
 def register_system_log_handlers():
     @socketio.on('system_log_created')
@@ -165,26 +194,8 @@ def register_announcement_handlers():
         """Broadcast when a new announcement is created"""
         emit('new_announcement', data, room='admin_room')
 
-        # Create notifications for relevant users
-        if data.get('is_public', False):
-            users = User.query.filter(User.is_active == True).all()
-        else:
-            office_id = data.get('target_office_id')
-            users = User.query.join(OfficeAdmin).filter(
-                OfficeAdmin.office_id == office_id,
-                User.is_active == True
-            ).all()
-
-        for user in users:
-            notification = Notification(
-                user_id=user.id,
-                title="New Announcement",
-                message=f"New announcement: {data.get('title')}",
-                is_read=False
-            )
-            db.session.add(notification)
-
-        db.session.commit()
+        # Create notifications for relevant users in the background
+        fan_out_announcement(data, current_user.id if current_user.is_authenticated else None)
 
 def register_user_management_handlers():
     """Register handlers for user management events"""
@@ -295,37 +306,22 @@ def register_dashboard_handlers():
     @socketio.on('request_dashboard_stats')
     def handle_dashboard_stats_request():
         """Handle request for dashboard statistics"""
-        if not current_user.is_authenticated or current_user.role != 'super_admin':
+        if not current_user.is_authenticated or current_user.role not in ['office_admin', 'super_admin']:
             return
         
-        # Get real-time statistics
-        active_users = User.query.filter_by(is_active=True).count()
-        pending_inquiries = Inquiry.query.filter_by(status='pending').count()
-        upcoming_sessions = CounselingSession.query.filter(
-            CounselingSession.scheduled_at > datetime.utcnow(),
-            CounselingSession.status == 'scheduled'
-        ).count()
-        
-        # Get office activity
-        offices = Office.query.all()
-        office_activity = []
-        for office in offices:
-            inquiries_count = Inquiry.query.filter_by(office_id=office.id).count()
-            sessions_count = CounselingSession.query.filter_by(office_id=office.id).count()
-            office_activity.append({
-                'office_id': office.id,
-                'office_name': office.name,
-                'inquiries_count': inquiries_count,
-                'sessions_count': sessions_count
-            })
+        send_full_snapshot('dashboard_stats')
+    
+    @socketio.on('request_dashboard_snapshot')
+    def handle_dashboard_snapshot_request(data=None):
+        """Resend a full versioned snapshot to a client that detected a version gap"""
+        if not current_user.is_authenticated or current_user.role not in ['office_admin', 'super_admin']:
+            return
         
-        emit('dashboard_stats', {
-            'active_users': active_users,
-            'pending_inquiries': pending_inquiries,
-            'upcoming_sessions': upcoming_sessions,
-            'office_activity': office_activity,
-            'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        })
+        channel = (data or {}).get('channel', 'dashboard_stats')
+        if channel == 'dashboard_stats_update' and current_user.role != 'super_admin':
+            return
+        if channel in SNAPSHOT_CHANNELS:
+            send_full_snapshot(channel)
     
     @socketio.on('request_system_health')
     def handle_system_health_request():
@@ -363,6 +359,29 @@ def register_dashboard_handlers():
         })
 
 # Utility functions for emitting events from other parts of the application
+def office_room(office_id):
+    """Name of the Socket.IO room shared by the admins of one office"""
+    return f"office_{office_id}"
+
+def get_admin_office_id(user):
+    """Return the office an office admin is assigned to, or None"""
+    if isinstance(user, CachedUser):
+        return user.office_id
+    office_admin = user.office_admin
+    return office_admin.office_id if office_admin else None
+
+def emit_to_office(event, data, office_id):
+    """
+    Emit an office-specific event to that office's admins and to all super admins.
+    
+    :param event: Socket.IO event name
+    :param data: event payload
+    :param office_id: office the event belongs to; None reaches super admins only
+    """
+    socketio.emit(event, data, room='super_admin_room')
+    if office_id:
+        socketio.emit(event, data, room=office_room(office_id))
+
 def emit_inquiry_update(inquiry, action_type):
     """
     Emit WebSocket event for inquiry updates.
@@ -371,36 +390,31 @@ def emit_inquiry_update(inquiry, action_type):
     :param action_type: 'new' or 'resolved'
     """
     if action_type == 'new':
-        student = User.query.join(Student).filter(Student.id == inquiry.student_id).first()
-        student_name = student.get_full_name() if student else "Unknown Student"
-        
-        office = Office.query.get(inquiry.office_id)
-        office_name = office.name if office else "Unknown Office"
+        student_name = get_student_name(inquiry.student_id, "Unknown Student")
+        office_name = get_office_name(inquiry.office_id, "Unknown Office")
         
-        socketio.emit('new_inquiry', {
+        emit_to_office('new_inquiry', {
             'inquiry_id': inquiry.id,
             'student_name': student_name,
             'subject': inquiry.subject,
             'office_id': inquiry.office_id,
             'office_name': office_name,
             'timestamp': inquiry.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }, room='admin_room')
+        }, inquiry.office_id)
     
     elif action_type == 'resolved':
         # Assuming resolved_by is a field in your Inquiry model
-        admin = User.query.get(inquiry.resolved_by) if hasattr(inquiry, 'resolved_by') and inquiry.resolved_by else None
-        admin_name = admin.get_full_name() if admin else "Unknown Admin"
-        
-        office = Office.query.get(inquiry.office_id)
-        office_name = office.name if office else "Unknown Office"
+        resolved_by = getattr(inquiry, 'resolved_by', None)
+        admin_name = get_user_name(resolved_by, "Unknown Admin")
+        office_name = get_office_name(inquiry.office_id, "Unknown Office")
         
-        socketio.emit('resolved_inquiry', {
+        emit_to_office('resolved_inquiry', {
             'inquiry_id': inquiry.id,
             'admin_name': admin_name,
             'office_id': inquiry.office_id,
             'office_name': office_name,
             'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        }, room='admin_room')
+        }, inquiry.office_id)
 
 def emit_system_log(log):
     """
@@ -408,15 +422,12 @@ def emit_system_log(log):
     
     :param log: The AuditLog object
     """
-    actor = None
     actor_name = "System"
     actor_role = "system"
     
     if hasattr(log, 'actor_id') and log.actor_id:
-        actor = User.query.get(log.actor_id)
-        if actor:
-            actor_name = f"{actor.first_name} {actor.last_name}"
-            actor_role = actor.role
+        actor_name = get_user_short_name(log.actor_id, actor_name)
+        actor_role = get_user_role(log.actor_id, actor_role)
     
     socketio.emit('system_log', {
         'action': log.action,
@@ -436,14 +447,9 @@ def emit_session_update(session, action_type):
     :param session: The CounselingSession object
     :param action_type: 'new', 'updated', 'cancelled', 'completed'
     """
-    student = User.query.join(Student).filter(Student.id == session.student_id).first()
-    student_name = student.get_full_name() if student else "Unknown Student"
-    
-    office = Office.query.get(session.office_id)
-    office_name = office.name if office else "Unknown Office"
-    
-    counselor = User.query.get(session.counselor_id)
-    counselor_name = counselor.get_full_name() if counselor else "Unassigned"
+    student_name = get_student_name(session.student_id, "Unknown Student")
+    office_name = get_office_name(session.office_id, "Unknown Office")
+    counselor_name = get_user_name(session.counselor_id, "Unassigned")
     
     event_data = {
         'session_id': session.id,
@@ -457,10 +463,10 @@ def emit_session_update(session, action_type):
     }
     
     if action_type == 'new':
-        socketio.emit('new_session', event_data, room='admin_room')
+        emit_to_office('new_session', event_data, session.office_id)
     else:
         event_data['action_type'] = action_type
-        socketio.emit('session_update', event_data, room='admin_room')
+        emit_to_office('session_update', event_data, session.office_id)
 
 def emit_user_update(user, action_type, updated_by=None, field_updated=None, new_value=None):
     """
@@ -551,34 +557,80 @@ def emit_super_admin_activity(admin, action, target_type, target=None, details=N
     
     socketio.emit('super_admin_activity', activity_data, room='super_admin_room')
 
+# Last published payload and version per stats channel; only deltas are broadcast
+dashboard_snapshot = VersionedSnapshot(keyed_lists={'office_activity': 'office_id'})
+office_dashboard_snapshots = {}  # office_id -> VersionedSnapshot of that office's stats
+admin_stats_snapshot = VersionedSnapshot()
+
+SNAPSHOT_CHANNELS = ('dashboard_stats', 'dashboard_stats_update')
+
+def _broadcast_delta(channel, snapshot, payload, room):
+    """Record a freshly computed payload and broadcast only what changed since the last version"""
+    delta = snapshot.publish(payload)
+    if delta:
+        socketio.emit(channel, delta, room=room)
+
+def _refresh_if_stale(snapshot, broadcaster, publish):
+    """
+    Make sure a requested snapshot is not older than DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS.
+    
+    Not every change marks the stats dirty (inquiries from the student and office
+    pages, sessions becoming past), so a snapshot older than the limit is refreshed
+    through the debounced broadcaster and the client receives the delta shortly after.
+    A channel that was never computed is computed right away so there is something to send.
+    """
+    age = snapshot.age()
+    if age is None:
+        publish()
+    elif age > current_app.config.get('DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS', 30):
+        broadcaster.mark_dirty()
+
+def send_full_snapshot(channel):
+    """
+    Send the requesting client the last published snapshot of a stats channel.
+    
+    Page loads and version gaps are answered from the cached snapshot instead of
+    recomputing and fanning out to every room; see _refresh_if_stale for how it is kept fresh.
+    """
+    if channel == 'dashboard_stats_update':
+        _refresh_if_stale(admin_stats_snapshot, admin_stats_broadcaster, emit_admin_stats_update)
+        snapshot = admin_stats_snapshot
+    else:
+        # update_dashboard_stats publishes the super admin snapshot and every office's together
+        _refresh_if_stale(dashboard_snapshot, stats_broadcaster, update_dashboard_stats)
+        if current_user.role == 'super_admin':
+            snapshot = dashboard_snapshot
+        else:
+            snapshot = office_dashboard_snapshots.get(get_admin_office_id(current_user))
+    
+    full = snapshot.full() if snapshot else None
+    if full:
+        emit(channel, full)
+
 def update_dashboard_stats():
     """
-    Update real-time dashboard statistics for super admins.
-    This can be called periodically or after significant system events.
+    Update real-time dashboard statistics.
+    Super admins get the system-wide figures; each office room gets its own office's figures.
+    Request handlers should call mark_dashboard_stats_dirty() instead, which
+    coalesces bursts of changes into one call to this function per window.
     """
-    active_users = User.query.filter_by(is_active=True).count()
-    pending_inquiries = Inquiry.query.filter_by(status='pending').count()
-    upcoming_sessions = CounselingSession.query.filter(
-        CounselingSession.scheduled_at > datetime.utcnow(),
-        CounselingSession.status == 'scheduled'
-    ).count()
-    
-    offices = Office.query.all()
-    office_activity = []
-    for office in offices:
-        inquiries_count = Inquiry.query.filter_by(office_id=office.id).count()
-        sessions_count = CounselingSession.query.filter_by(office_id=office.id).count()
-        office_activity.append({
-            'office_id': office.id,
-            'office_name': office.name,
-            'inquiries_count': inquiries_count,
-            'sessions_count': sessions_count
-        })
+    stats = compute_dashboard_stats()
+    _broadcast_delta('dashboard_stats', dashboard_snapshot, realtime_stats_payload(stats), 'super_admin_room')
     
-    socketio.emit('dashboard_stats', {
-        'active_users': active_users,
-        'pending_inquiries': pending_inquiries,
-        'upcoming_sessions': upcoming_sessions,
-        'office_activity': office_activity,
-        'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-    }, room='super_admin_room')
\ No newline at end of file
+    for office in stats['offices']:
+        snapshot = office_dashboard_snapshots.setdefault(office['office_id'], VersionedSnapshot())
+        _broadcast_delta('dashboard_stats', snapshot, office_stats_payload(office), office_room(office['office_id']))
+
+def emit_admin_stats_update():
+    """Broadcast changed admin management counters as a versioned dashboard_stats_update"""
+    _broadcast_delta('dashboard_stats_update', admin_stats_snapshot, compute_admin_management_stats(), 'super_admin_room')
+
+stats_broadcaster = DebouncedBroadcaster(update_dashboard_stats, 'DASHBOARD_STATS_DEBOUNCE_MS')
+admin_stats_broadcaster = DebouncedBroadcaster(emit_admin_stats_update, 'DASHBOARD_STATS_DEBOUNCE_MS')
+
+def mark_dashboard_stats_dirty():
+    """
+    Signal that dashboard statistics changed.
+    The recomputation and broadcast happen once per debounce window in the background.
+    """
+    stats_broadcaster.mark_dirty()
\ No newline at end of file
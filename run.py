@@ -1,6 +1,7 @@
 import eventlet
 eventlet.monkey_patch()
 
+import os
 import sys
 from pathlib import Path
 from app import create_app
@@ -12,5 +13,13 @@ sys.path.append(str(Path(__file__).parent))
 app = create_app()
 
 if __name__ == '__main__':
+    debug = True
+    
+    # Scheduled log retention runs inside the server process (also available as `flask logs purge`).
+    # With the debug reloader only the serving child starts it, not the watcher parent
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.services.retention import start_schedule
+        start_schedule(app)
+    
     # Use eventlet WSGI server
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=5000, debug=debug)
\ No newline at end of file
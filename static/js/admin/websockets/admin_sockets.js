@@ -52,6 +52,18 @@ class AdminSocketManager {
     }
 
     _initializeAdminDashboard() {
+        // Versioned dashboard statistics: a full snapshot, then deltas of what changed
+        this.socketManager.on('dashboard_stats', (data) => {
+            this._checkSnapshotVersion('dashboard_stats', data);
+            this._mergeDashboardStats(data);
+            this._updateSystemStats(this.dashboardStats);
+            document.dispatchEvent(new CustomEvent('dashboard:stats', { detail: this.dashboardStats }));
+        });
+        
+        document.addEventListener('socket:connected', () => {
+            this.socketManager.emit('request_dashboard_stats');
+        });
+        
         // Real-time system stats updates
         this.socketManager.on('system_stats_update', (data) => {
             this._updateSystemStats(data);
@@ -298,6 +310,42 @@ class AdminSocketManager {
         }, 5000);
     }
     
+    _checkSnapshotVersion(channel, data) {
+        // Stats channels send only changed fields plus a version number.
+        // A skipped version means a delta was missed, so ask for a full snapshot.
+        if (data.version === undefined) return;
+        
+        this.snapshotVersions = this.snapshotVersions || {};
+        const lastVersion = this.snapshotVersions[channel];
+        this.snapshotVersions[channel] = data.version;
+        
+        if (!data.full && lastVersion !== undefined && data.version !== lastVersion + 1) {
+            this.socketManager.emit('request_dashboard_snapshot', { channel: channel });
+        }
+    }
+    
+    _mergeDashboardStats(data) {
+        // Apply a dashboard_stats message to the copy kept for this page.
+        // office_activity deltas carry only the changed offices; removed ones are
+        // listed by id in office_activity_removed.
+        if (data.full || !this.dashboardStats) {
+            this.dashboardStats = {};
+        }
+        const stats = this.dashboardStats;
+        
+        Object.keys(data).forEach(key => {
+            if (['version', 'full', 'office_activity', 'office_activity_removed'].includes(key)) return;
+            stats[key] = data[key];
+        });
+        
+        if (data.office_activity || data.office_activity_removed) {
+            const offices = new Map((stats.office_activity || []).map(office => [office.office_id, office]));
+            (data.office_activity || []).forEach(office => offices.set(office.office_id, office));
+            (data.office_activity_removed || []).forEach(officeId => offices.delete(officeId));
+            stats.office_activity = Array.from(offices.values());
+        }
+    }
+    
     _formatDateTime(timestamp) {
         if (!timestamp) return 'unknown time';
         
@@ -317,6 +365,7 @@ class AdminSocketManager {
         // Handle dashboard stats updates
         this.socketManager.on('dashboard_stats_update', (data) => {
             console.log('Received dashboard stats update:', data);
+            this._checkSnapshotVersion('dashboard_stats_update', data);
             
             // Update office admin stats
             if (data.active_office_admins !== undefined) {